@@ -0,0 +1,134 @@
+import os
+import json
+import random
+import asyncio
+from dotenv import load_dotenv
+from market_data import CRYPTO_SYMBOLS, crypto_snapshot
+from timeseries import price_store
+
+load_dotenv()
+
+BINANCE_WS_URL = os.getenv('BINANCE_WS_URL', 'wss://stream.binance.com:9443')
+STREAM_GAP_THRESHOLD = float(os.getenv('STREAM_GAP_THRESHOLD', 5))
+STREAM_IDLE_TIMEOUT = float(os.getenv('STREAM_IDLE_TIMEOUT', 30))
+RECONNECT_MIN_DELAY = float(os.getenv('STREAM_RECONNECT_MIN_DELAY', 1))
+RECONNECT_MAX_DELAY = float(os.getenv('STREAM_RECONNECT_MAX_DELAY', 60))
+
+def combined_stream_url(symbols, base_url=BINANCE_WS_URL):
+    streams = "/".join(f"{symbol.lower()}@ticker" for symbol in symbols)
+    return f"{base_url}/stream?streams={streams}"
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+class TickerStream:
+    def __init__(self, symbols, url=None, snapshot=None, store=None):
+        self.symbols = list(symbols)
+        self.url = url or combined_stream_url(self.symbols)
+        self.snapshot = crypto_snapshot if snapshot is None else snapshot
+        self.store = price_store if store is None else store
+        self.stats = {}
+        self._last_event = {}
+        self.connected = False
+        self.messages = 0
+        self.reconnects = 0
+        self.gaps = 0
+        self.bad_frames = 0
+
+    def parse_message(self, raw):
+        message = json.loads(raw)
+        data = message.get('data', message)
+        if data.get('e') != '24hrTicker':
+            return None
+
+        event_time = int(data['E'])
+        return data['s'], event_time, {
+            "last_price": float(data['c']),
+            "open_price": _to_float(data.get('o')),
+            "high_price": _to_float(data.get('h')),
+            "low_price": _to_float(data.get('l')),
+            "price_change": _to_float(data.get('p')),
+            "price_change_percent": _to_float(data.get('P')),
+            "volume": _to_float(data.get('v')),
+            "quote_volume": _to_float(data.get('q')),
+            "trade_count": data.get('n'),
+            "event_time": event_time
+        }
+
+    def handle_message(self, raw):
+        try:
+            parsed = self.parse_message(raw)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            self.bad_frames += 1
+            print(f"Skipping malformed ticker frame: {e!r}")
+            return
+        if parsed is None:
+            return
+
+        symbol, event_time, stats = parsed
+        previous = self._last_event.get(symbol)
+        if previous is not None:
+            if event_time <= previous:
+                return
+            if event_time - previous > STREAM_GAP_THRESHOLD * 1000:
+                self.gaps += 1
+                print(f"Ticker stream gap for {symbol}: {(event_time - previous) / 1000:.1f}s without updates")
+        self._last_event[symbol] = event_time
+
+        self.stats = {**self.stats, symbol: stats}
+        self.snapshot.update({symbol: stats["last_price"]}, updated_at=event_time / 1000)
+        self.store.append(symbol, "tick", event_time, stats["last_price"])
+        self.messages += 1
+
+    async def run(self):
+        import websockets
+
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as websocket:
+                    self.connected = True
+                    while True:
+                        raw = await asyncio.wait_for(websocket.recv(), STREAM_IDLE_TIMEOUT)
+                        self.handle_message(raw)
+                        delay = RECONNECT_MIN_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ticker stream error: {e}")
+            finally:
+                self.connected = False
+
+            self.reconnects += 1
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def metrics(self):
+        return {
+            "connected": self.connected,
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "gaps": self.gaps,
+            "bad_frames": self.bad_frames
+        }
+
+ticker_stream = TickerStream(CRYPTO_SYMBOLS)
+
+_stream_task = None
+
+def start_stream():
+    global _stream_task
+    if _stream_task is None or _stream_task.done():
+        _stream_task = asyncio.create_task(ticker_stream.run())
+    return _stream_task
+
+async def stop_stream():
+    global _stream_task
+    if _stream_task is None:
+        return
+    _stream_task.cancel()
+    try:
+        await _stream_task
+    except asyncio.CancelledError:
+        pass
+    _stream_task = None
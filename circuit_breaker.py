@@ -0,0 +1,102 @@
+import os
+import time
+import asyncio
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', 20))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 5))
+BREAKER_ERROR_RATE = float(os.getenv('BREAKER_ERROR_RATE', 0.5))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', 2))
+BREAKER_SLOW_CALL_RATE = float(os.getenv('BREAKER_SLOW_CALL_RATE', 0.5))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 30))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self._results = deque(maxlen=BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self.rejected = 0
+        self.changed_at = time.time()
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        self.transitions[state] += 1
+        self.changed_at = time.time()
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probe_in_flight = False
+        if state == CLOSED:
+            self._results.clear()
+
+    def allow(self):
+        if self.state == OPEN and time.monotonic() - self._opened_at >= BREAKER_OPEN_SECONDS:
+            self._set_state(HALF_OPEN)
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record(self, success, duration):
+        if self.state == HALF_OPEN:
+            if success and duration < BREAKER_SLOW_CALL_SECONDS:
+                self._set_state(CLOSED)
+            else:
+                self._set_state(OPEN)
+            return
+
+        self._results.append((success, duration >= BREAKER_SLOW_CALL_SECONDS))
+        if len(self._results) < BREAKER_MIN_CALLS:
+            return
+
+        failures = sum(1 for ok, _ in self._results if not ok)
+        slow_calls = sum(1 for _, slow in self._results if slow)
+        if failures / len(self._results) >= BREAKER_ERROR_RATE or slow_calls / len(self._results) >= BREAKER_SLOW_CALL_RATE:
+            self._set_state(OPEN)
+
+    async def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+        started = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._probe_in_flight = False
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+    def metrics(self):
+        return {
+            "state": self.state,
+            "changed_at": self.changed_at,
+            "transitions": dict(self.transitions),
+            "rejected": self.rejected,
+            "window_calls": len(self._results),
+            "window_failures": sum(1 for ok, _ in self._results if not ok)
+        }
@@ -1,5 +1,15 @@
 import os
+import re
+import time
+import hashlib
+import asyncio
+import threading
+from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +30,323 @@ DB_CONFIG = {
     'sslmode': DB_MODE
 }
 
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 1800))
+DB_POOL_CHECK_AFTER = float(os.getenv('DB_POOL_CHECK_AFTER', 30))
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', DB_POOL_MAX))
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'false').lower() == 'true'
+
+DECIMAL_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DECIMAL_AS_FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+psycopg2.extensions.register_type(DECIMAL_AS_FLOAT)
+
 def db_conn():
     conn = psycopg2.connect(**DB_CONFIG)
-    return conn
\ No newline at end of file
+    return conn
+
+class PoolTimeout(Exception):
+    pass
+
+class StatementCache:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self._prepared = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _positional(sql):
+        counter = iter(range(1, sql.count('%s') + 1))
+        return re.sub(r'%s', lambda _: f"${next(counter)}", sql)
+
+    def _stat(self, name):
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = {
+                "prepares": 0,
+                "executions": 0,
+                "retries": 0,
+                "errors": 0,
+                "time_total": 0.0,
+                "time_max": 0.0
+            }
+        return stat
+
+    def execute(self, cursor, sql, params=()):
+        name = "stmt_" + hashlib.sha1(sql.encode()).hexdigest()[:16]
+        conn = cursor.connection
+        with self._lock:
+            stat = self._stat(name)
+            names = self._prepared.setdefault(conn, set())
+
+        started = time.monotonic()
+        try:
+            if not self.enabled:
+                cursor.execute(sql, params)
+            else:
+                fresh = conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                try:
+                    self._execute_prepared(cursor, name, sql, params, names, stat)
+                except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement) as e:
+                    with self._lock:
+                        if isinstance(e, psycopg2.errors.InvalidSqlStatementName):
+                            names.discard(name)
+                        else:
+                            names.add(name)
+                    if not fresh:
+                        raise
+                    conn.rollback()
+                    with self._lock:
+                        stat["retries"] += 1
+                    self._execute_prepared(cursor, name, sql, params, names, stat)
+        except Exception:
+            with self._lock:
+                stat["errors"] += 1
+            raise
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stat["executions"] += 1
+            stat["time_total"] += elapsed
+            stat["time_max"] = max(stat["time_max"], elapsed)
+
+    def _execute_prepared(self, cursor, name, sql, params, names, stat):
+        with self._lock:
+            prepared = name in names
+        if not prepared:
+            cursor.execute(f"PREPARE {name} AS {self._positional(sql)}")
+            with self._lock:
+                names.add(name)
+                stat["prepares"] += 1
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+
+    def forget(self, conn):
+        with self._lock:
+            self._prepared.pop(conn, None)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "connections": len(self._prepared),
+                "statements": {
+                    name: {
+                        **stat,
+                        "time_avg": stat["time_total"] / stat["executions"] if stat["executions"] else 0.0
+                    }
+                    for name, stat in self._stats.items()
+                }
+            }
+
+class ConnectionPool:
+    def __init__(self, connect, min_size, max_size, timeout, max_idle, max_lifetime, check_after, statements):
+        self._connect = connect
+        self.statements = statements
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.failed_checks = 0
+
+    def _new_connection(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[conn] = time.monotonic()
+            self.created += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._created_at.pop(conn, None)
+        self.statements.forget(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _expired(self, conn, returned_at, now, size):
+        if now - returned_at > self.max_idle and size > self.min_size:
+            return True
+        return now - self._created_at.get(conn, now) > self.max_lifetime
+
+    def _healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self.failed_checks += 1
+            return False
+
+    def _checkout(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn, returned_at = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                conn = self._new_connection()
+            else:
+                now = time.monotonic()
+                with self._cond:
+                    expired = conn.closed or self._expired(conn, returned_at, now, self._size)
+                    if expired:
+                        self.recycled += 1
+                if expired:
+                    self._discard(conn)
+                    continue
+                if now - returned_at > self.check_after and not self._healthy(conn):
+                    self._discard(conn)
+                    continue
+
+            wait_time = time.monotonic() - started
+            with self._cond:
+                self.checkouts += 1
+                if waited:
+                    self.waits += 1
+                self.wait_time_total += wait_time
+                self.wait_time_max = max(self.wait_time_max, wait_time)
+            return conn
+
+    def getconn(self):
+        return self._checkout()
+
+    def putconn(self, conn):
+        if conn.closed:
+            self._discard(conn)
+            return
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                self._discard(conn)
+                return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        self._sweep()
+
+    def _sweep(self):
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            size = self._size
+            kept = deque()
+            for conn, returned_at in self._idle:
+                if self._expired(conn, returned_at, now, size):
+                    expired.append(conn)
+                    size -= 1
+                else:
+                    kept.append((conn, returned_at))
+            self._idle = kept
+            self.recycled += len(expired)
+        for conn in expired:
+            self._discard(conn)
+
+    def open(self):
+        conns = [self.getconn() for _ in range(self.min_size)]
+        for conn in conns:
+            self.putconn(conn)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_avg": self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+                "wait_time_max": self.wait_time_max,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "recycled": self.recycled,
+                "failed_checks": self.failed_checks
+            }
+
+pool = ConnectionPool(
+    db_conn,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_TIMEOUT,
+    DB_POOL_MAX_IDLE,
+    DB_POOL_MAX_LIFETIME,
+    DB_POOL_CHECK_AFTER,
+    StatementCache(DB_PREPARED_STATEMENTS)
+)
+
+db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+_db_pending = 0
+
+async def run_db(func, *args, **kwargs):
+    global _db_pending
+    loop = asyncio.get_running_loop()
+    _db_pending += 1
+    try:
+        return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+    finally:
+        _db_pending -= 1
+
+def shutdown_executor():
+    db_executor.shutdown(wait=True)
+
+def executor_metrics():
+    return {
+        "workers": DB_EXECUTOR_WORKERS,
+        "pending": _db_pending
+    }
@@ -0,0 +1,72 @@
+import io
+import os
+import csv
+import json
+import asyncio
+from dotenv import load_dotenv
+from database import run_db
+from models import SavedCalculations
+from row_mapping import PROFIT_LOSS, DIVIDEND, RRR
+
+load_dotenv()
+
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 500))
+EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', 4))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+CSV_COLUMNS = ["type"]
+for _spec in (PROFIT_LOSS, DIVIDEND, RRR):
+    CSV_COLUMNS.extend(name for name in _spec.columns if name not in CSV_COLUMNS)
+
+def _ndjson_chunk(key, spec, rows):
+    return "".join(
+        json.dumps({"type": key, **spec.convert(row)}) + "\n"
+        for row in rows
+    )
+
+def _csv_chunk(key, spec, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    for row in rows:
+        writer.writerow({"type": key, **spec.convert(row)})
+    return buffer.getvalue()
+
+def _csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue()
+
+def iter_export(user_id, file_format):
+    encode = _csv_chunk if file_format == "csv" else _ndjson_chunk
+    if file_format == "csv":
+        yield _csv_header()
+    for key, spec, rows in SavedCalculations.iter_user_portfolio(user_id, EXPORT_FETCH_SIZE):
+        yield encode(key, spec, rows)
+
+export_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+def exports_busy():
+    return export_slots.locked()
+
+async def stream_export(user_id, file_format):
+    async with export_slots:
+        chunks = iter_export(user_id, file_format)
+        pending = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(run_db(next, chunks, None))
+                chunk = await asyncio.shield(pending)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            if pending is not None and not pending.done():
+                try:
+                    await pending
+                except Exception:
+                    pass
+            await run_db(chunks.close)
@@ -0,0 +1,216 @@
+import io
+import os
+import csv
+import json
+import math
+from datetime import datetime
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+from database import pool
+
+load_dotenv()
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', 50000))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 100))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+REQUIRED = object()
+
+class ImportRejected(Exception):
+    def __init__(self, message, errors, error_count):
+        super().__init__(message)
+        self.errors = errors
+        self.error_count = error_count
+
+def _text(value):
+    return str(value).strip()
+
+def _number(value):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+def _integer(value):
+    number = _number(value)
+    if not number.is_integer():
+        raise ValueError(f"{value!r} is not a whole number")
+    return int(number)
+
+def _date(value):
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+
+IMPORT_SPECS = {
+    "pl": ("saved_profit_loss", [
+        ("title", _text, "Untitled Trade"),
+        ("calculation_date", _date, None),
+        ("asset_type", _text, ""),
+        ("open_price", _number, REQUIRED),
+        ("close_price", _number, REQUIRED),
+        ("amount", _number, REQUIRED),
+        ("volume", _integer, None),
+        ("leverage", _number, None),
+        ("position_size", _number, 0),
+        ("profit_loss", _number, 0),
+        ("profit_loss_yield", _number, 0),
+        ("margin", _number, None),
+    ]),
+    "div": ("saved_dividend", [
+        ("title", _text, "Untitled Dividend Calculation"),
+        ("calculation_date", _date, None),
+        ("price_of_1_share", _number, REQUIRED),
+        ("from_currency", _text, "USD"),
+        ("number_of_shares", _number, REQUIRED),
+        ("div_per_1_share", _number, REQUIRED),
+        ("pay_period", _text, "year"),
+        ("own_period", _number, 0),
+        ("tax_rate", _number, None),
+        ("div_growth", _number, None),
+        ("total_div", _number, 0),
+        ("div_yield", _number, 0),
+        ("total_div_yield", _number, 0),
+        ("invest", _number, 0),
+        ("ann_div_yield", _number, 0),
+        ("total_period_div_yield", _number, 0),
+        ("total_return", _number, 0),
+        ("ave_ann_ret", _number, 0),
+    ]),
+    "rrr": ("saved_rrr", [
+        ("title", _text, "Untitled RRR Calculation"),
+        ("calculation_date", _date, None),
+        ("open_price", _number, REQUIRED),
+        ("take_profit", _number, REQUIRED),
+        ("stop_loss", _number, REQUIRED),
+        ("balance", _number, 0),
+        ("risk_per_trade", _number, 0),
+        ("position_size", _number, 0),
+        ("position_cost", _number, 0),
+        ("rrr", _number, 0),
+        ("profit_per_share", _number, 0),
+        ("risk_per_share", _number, 0),
+        ("total_profit", _number, 0),
+        ("total_risk", _number, 0),
+        ("balance_after_profit", _number, 0),
+        ("balance_after_loss", _number, 0),
+    ]),
+}
+
+def detect_format(filename, content_type=None):
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+def _check_header(fields, header):
+    header = set(header or [])
+    if "date" in header:
+        header.add("calculation_date")
+    names = [name for name, _, _ in fields]
+    if not header.intersection(names):
+        raise ValueError(f"CSV header has none of the expected columns: {', '.join(names)}")
+    missing = [name for name, _, default in fields if default is REQUIRED and name not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing required columns: {', '.join(missing)}")
+
+def _read_csv(stream, fields):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    _check_header(fields, reader.fieldnames)
+    try:
+        for record in reader:
+            yield reader.line_num, record
+    except csv.Error as e:
+        raise ValueError(f"Line {reader.line_num}: {e}")
+
+def _read_ndjson(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError("expected a JSON object")
+            continue
+        yield line_number, record
+
+def _convert(fields, user_id, record):
+    if "date" in record and "calculation_date" not in record:
+        record["calculation_date"] = record["date"]
+    values = [user_id]
+    for name, convert, default in fields:
+        value = record.get(name)
+        if value is None or value == "":
+            if default is REQUIRED:
+                raise ValueError(f"{name}: a value is required")
+            values.append(default)
+            continue
+        try:
+            values.append(convert(value))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{name}: {e}")
+    return tuple(values)
+
+def import_file(kind, user_id, stream, file_format, skip_invalid=False):
+    table, fields = IMPORT_SPECS[kind]
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+    records = _read_csv(stream, fields) if file_format == "csv" else _read_ndjson(stream)
+    errors = []
+    counts = {"imported": 0, "errors": 0}
+
+    def valid_rows():
+        for line_number, record in records:
+            if counts["imported"] >= IMPORT_MAX_ROWS:
+                raise ValueError(f"Import is limited to {IMPORT_MAX_ROWS} rows")
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                row = _convert(fields, user_id, record)
+            except ValueError as e:
+                counts["errors"] += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"line": line_number, "error": str(e)})
+                continue
+            counts["imported"] += 1
+            yield row
+
+    columns = ", ".join(["user_id"] + [name for name, _, _ in fields])
+    conn = pool.getconn()
+    cursor = conn.cursor()
+    try:
+        execute_values(
+            cursor,
+            f"INSERT INTO {table} ({columns}) VALUES %s",
+            valid_rows(),
+            page_size=IMPORT_BATCH_SIZE
+        )
+        if counts["errors"] and not skip_invalid:
+            raise ImportRejected(
+                f"{counts['errors']} invalid rows, nothing was imported",
+                errors,
+                counts["errors"]
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        pool.putconn(conn)
+
+    return {
+        "imported": counts["imported"],
+        "error_count": counts["errors"],
+        "errors": errors
+    }
@@ -0,0 +1,93 @@
+import os
+import time
+import asyncio
+from bisect import bisect_left
+from dotenv import load_dotenv
+from upstream import BINANCE, upstream_get, budgets
+from timeseries import price_store
+
+load_dotenv()
+
+KLINE_INTERVALS = ("1h", "4h", "1d")
+KLINES_MAX_LIMIT = 1000
+KLINES_REFRESH_INTERVAL = float(os.getenv('KLINES_REFRESH_INTERVAL', 15))
+
+async def fetch_klines(symbol, interval, limit, start_time=None):
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    response = await upstream_get(BINANCE, "/api/v3/klines", params)
+    candles = [[candle[0], float(candle[4])] for candle in response.json()]
+    price_store.append_many(symbol, interval, candles)
+    return candles
+
+class CandleCache:
+    def __init__(self, fetch, refresh_interval):
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self._series = {}
+        self._open_times = {}
+        self._depth = {}
+        self._checked_at = {}
+        self._locks = {}
+        self.hits = 0
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+        self.stale_served = 0
+
+    async def _refresh(self, key, limit):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            depth = self._depth.get(key, 0)
+            refresh_interval = budgets[BINANCE].scaled(self.refresh_interval)
+            fresh = time.monotonic() - self._checked_at.get(key, 0) < refresh_interval
+            if fresh and limit <= depth:
+                self.hits += 1
+                return
+
+            symbol, interval = key
+            candles = self._series.get(key, [])
+            if candles and limit <= depth:
+                new_candles = await self._fetch(symbol, interval, KLINES_MAX_LIMIT, start_time=candles[-1][0])
+                self.incremental_fetches += 1
+                if new_candles:
+                    cut = bisect_left(self._open_times[key], new_candles[0][0])
+                    candles = candles[:cut] + new_candles
+            else:
+                depth = max(limit, depth)
+                candles = await self._fetch(symbol, interval, depth)
+                self.full_fetches += 1
+
+            candles = candles[-KLINES_MAX_LIMIT:]
+            self._series[key] = candles
+            self._open_times[key] = [candle[0] for candle in candles]
+            self._depth[key] = depth
+            self._checked_at[key] = time.monotonic()
+
+    async def get(self, symbol, interval, limit, since=None):
+        key = (symbol, interval)
+        stale = False
+        try:
+            await self._refresh(key, limit)
+        except Exception as e:
+            if key not in self._series:
+                raise
+            print(f"Serving cached {symbol} {interval} candles: {e}")
+            self.stale_served += 1
+            stale = True
+
+        candles = self._series[key]
+        if since is not None:
+            return candles[bisect_left(self._open_times[key], since):], stale
+        return candles[-limit:], stale
+
+    def stats(self):
+        return {
+            "series": len(self._series),
+            "hits": self.hits,
+            "full_fetches": self.full_fetches,
+            "incremental_fetches": self.incremental_fetches,
+            "stale_served": self.stale_served
+        }
+
+candle_cache = CandleCache(fetch_klines, KLINES_REFRESH_INTERVAL)
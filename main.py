@@ -1,21 +1,65 @@
-from fastapi import FastAPI, Request, Form, HTTPException, status, Body
+from fastapi import FastAPI, Request, Form, HTTPException, status, Body, File, UploadFile
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from models import User, SavedCalculations
-from typing import Optional
+from database import pool, run_db, shutdown_executor, executor_metrics
+from migrations import run_migrations
+from imports import IMPORT_SPECS, ImportRejected, detect_format, import_file
+from exports import EXPORT_FORMATS, exports_busy, stream_export
+from write_buffer import WriteBufferFull, write_buffer
+from typing import Optional, List
 from fastapi.middleware.cors import CORSMiddleware
 from email_service import EmailService
+from upstream import BINANCE, open_clients, close_clients, upstream_get, breakers, budgets
+from quota import quota_store
+from rates import rates_cache
+from market_data import CRYPTO_SYMBOLS, CRYPTO_ALLOWED_SYMBOLS, crypto_snapshot, refresh_prices, refresh_metrics, start_poller, stop_poller
+from binance_stream import ticker_stream, start_stream, stop_stream
+from price_stream import TOPICS, price_broadcaster
+from klines import KLINE_INTERVALS, KLINES_MAX_LIMIT, candle_cache
+from stocks import STOCK_MAX_SYMBOLS, stock_quotes
+from timeseries import HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT, price_store
+from sessions import session_store
+from passwords import AuthBusyError, password_hasher
 from datetime import datetime, timedelta
-import uuid
-import httpx
+import hashlib
+import secrets
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    yield
+    open_clients()
+    try:
+        pool.open()
+    except Exception as e:
+        print(f"Error opening database pool: {e}")
+    try:
+        run_migrations()
+    except Exception as e:
+        print(f"Error running database migrations: {e}")
+    if MARKET_DATA_MODE == "stream":
+        start_stream()
+    else:
+        start_poller(CHECK_INTERVAL)
+    price_broadcaster.start()
+    write_buffer.start()
+    try:
+        yield
+    finally:
+        await price_broadcaster.stop()
+        await stop_stream()
+        await stop_poller()
+        await close_clients()
+        quota_store.close()
+        price_store.close()
+        await write_buffer.stop()
+        shutdown_executor()
+        session_store.close()
+        password_hasher.shutdown()
+        pool.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -29,9 +73,8 @@ app.add_middleware(
 
 load_dotenv()
 
-API_KEY_ER = os.getenv("API_ID_ER")
-FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 SECRET_KEY = os.getenv("API_ID_SECRET_KEY")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 SMTP_SERVER = os.getenv("SERVER")
 SMTP_PORT = os.getenv("SMTP_PORT")
@@ -41,16 +84,24 @@ EMAIL_PASSWORD = os.getenv("PASSWORD")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-sessions = {}
+BITCOIN = "BTCUSDT"
+ETHEREUM = "ETHUSDT"
+CHECK_INTERVAL = float(os.getenv("CHECK_INTERVAL", 5))
+MARKET_DATA_MODE = os.getenv("MARKET_DATA_MODE", "poll")
+MAX_PRICE_AGE = float(os.getenv("MAX_PRICE_AGE", 30))
+CRYPTO_MAX_SYMBOLS = int(os.getenv("CRYPTO_MAX_SYMBOLS", 20))
 
-BITCOIN = "https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT"
-ETHEREUM = "https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT"
-CHECK_INTERVAL = 5
+STOCK_SYMBOLS = ["AAPL", "NVDA", "TSLA", "AMZN"]
+STREAM_CRYPTO_INTERVAL = float(os.getenv("STREAM_CRYPTO_INTERVAL", 1))
+STREAM_FX_INTERVAL = float(os.getenv("STREAM_FX_INTERVAL", 30))
+STREAM_STOCKS_INTERVAL = float(os.getenv("STREAM_STOCKS_INTERVAL", 30))
+SAVED_PAGE_SIZE = int(os.getenv("SAVED_PAGE_SIZE", 50))
+SAVED_MAX_PAGE_SIZE = int(os.getenv("SAVED_MAX_PAGE_SIZE", 200))
 
 @app.get("/", response_class=HTMLResponse)
 @app.post("/", response_class=HTMLResponse)
 async def main_page(request: Request):
-    user = get_current_user(request)
+    user = await get_current_user(request)
     user_email = user.email if user else ""
 
     return templates.TemplateResponse("index.html", {
@@ -59,36 +110,18 @@ async def main_page(request: Request):
         "user_email": user_email
     })
 
-async def check_prices():
-    try:
-        async with httpx.AsyncClient() as client:
-            btc_response = await client.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT")
-            eth_response = await client.get("https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT")
-
-            btc_price = float(btc_response.json()["price"])
-            eth_price = float(eth_response.json()["price"])
-
-            return {"BTC": btc_price, "ETH": eth_price}
-    except Exception as e:
-        print(f"Error fetching prices: {e}")
-        return None
-
 async def get_crypto_price():
     try:
-        async with httpx.AsyncClient() as client:
-            response = client.get(BITCOIN, timeout=5)
-            return float(response.json()["price"])
+        response = await upstream_get(BINANCE, "/api/v3/ticker/price", {"symbol": BITCOIN})
+        return float(response.json()["price"])
     except:
         return None
 
-def get_current_user(request: Request) -> Optional[User]:
+async def get_current_user(request: Request) -> Optional[User]:
     session_id = request.cookies.get("session_id")
     if not session_id:
         return None
-    user_id = sessions.get(session_id)
-    if not user_id:
-        return None
-    return User.get_user_by_id(user_id)
+    return await run_db(session_store.get, session_id)
 
 @app.get("/signin_page", response_class=HTMLResponse)
 async def signin_page_get(request: Request):
@@ -101,18 +134,27 @@ async def signup_page_get(request: Request):
 
 @app.post("/signup_page")
 async def signup_page(
+        request: Request,
         username: str = Form(...),
         email: str = Form(...),
         password: str = Form(...)
 ):
     try:
-        User.create_user(username, email, password)
+        password_hash = await password_hasher.hash(password)
+        await run_db(User.create_user, username, email, password_hash)
 
         return RedirectResponse(url="/", status_code=303)
+    except AuthBusyError as e:
+        return templates.TemplateResponse(
+            "signup.html",
+            {"request": request, "error": str(e)},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "signup.html",
-            {"request": Request, "error": str(e)},
+            {"request": request, "error": str(e)},
             status_code=400
         )
 
@@ -122,7 +164,19 @@ async def signin_page(
         email: str = Form(...),
         password: str = Form(...)
 ):
-    user = User.get_user_by_credentials(email, password)
+    record = await run_db(User.get_user_with_password_hash, email)
+    user = None
+    if record:
+        try:
+            if await password_hasher.verify(password, record[1]):
+                user = record[0]
+        except AuthBusyError as e:
+            return templates.TemplateResponse(
+                "signin.html",
+                {"request": request, "error": str(e)},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
     if not user:
         return templates.TemplateResponse(
             "signin.html",
@@ -130,8 +184,7 @@ async def signin_page(
             status_code=401
         )
 
-    session_id = str(uuid.uuid4())
-    sessions[session_id] = user.id
+    session_id = await run_db(session_store.create, user)
 
     response = RedirectResponse(url="/profile", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(
@@ -144,14 +197,17 @@ async def signin_page(
     return response
 
 @app.get("/logout")
-async def logout():
+async def logout(request: Request):
+    session_id = request.cookies.get("session_id")
+    if session_id:
+        await run_db(session_store.delete, session_id)
     response = RedirectResponse(url="/")
     response.delete_cookie("session_id")
     return response
 
 @app.get("/profile")
 async def profile(request: Request):
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/")
 
@@ -207,28 +263,52 @@ async def converter(
         if amount <= 0:
             return JSONResponse({"error": "Amount must be greater than zero!"}, status_code=400)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://openexchangerates.org/api/latest.json?app_id={API_KEY_ER}")
-            data = response.json()
-            rates = data['rates']
+        matrix = await rates_cache.get_matrix()
 
-            if from_currency not in rates or to_asset not in rates:
-                return JSONResponse({"error": "Currency is not supported!"}, status_code=400)
+        if from_currency not in matrix or to_asset not in matrix:
+            return JSONResponse({"error": "Currency is not supported!"}, status_code=400)
 
-            usd_amount = amount / rates[from_currency]
-            converted_amount = usd_amount * rates[to_asset]
-            exchange_rate = (amount/converted_amount)
+        converted_amount = matrix.convert(amount, from_currency, to_asset)
+        exchange_rate = matrix.rate(to_asset, from_currency)
 
-            return JSONResponse({
-                "status": "success",
-                "result": {
-                    "amount": amount,
-                    "from_currency": from_currency,
-                    "converted_amount": converted_amount,
-                    "to_asset": to_asset,
-                    "exchange_rate": exchange_rate
-                }
-            })
+        return JSONResponse({
+            "status": "success",
+            "result": {
+                "amount": amount,
+                "from_currency": from_currency,
+                "converted_amount": converted_amount,
+                "to_asset": to_asset,
+                "exchange_rate": exchange_rate
+            }
+        })
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/calculate_conversions")
+async def converter_many(
+    amounts: List[float] = Body(...),
+    from_currencies: List[str] = Body(...),
+    to_assets: List[str] = Body(...)
+):
+    try:
+        if not (len(amounts) == len(from_currencies) == len(to_assets)):
+            return JSONResponse({"error": "Amounts and currencies must have the same length!"}, status_code=400)
+        if any(amount <= 0 for amount in amounts):
+            return JSONResponse({"error": "Amount must be greater than zero!"}, status_code=400)
+
+        matrix = await rates_cache.get_matrix()
+
+        if any(currency not in matrix for currency in from_currencies + to_assets):
+            return JSONResponse({"error": "Currency is not supported!"}, status_code=400)
+
+        converted_amounts = matrix.convert_many(amounts, from_currencies, to_assets)
+
+        return JSONResponse({
+            "status": "success",
+            "result": {
+                "converted_amounts": converted_amounts.tolist()
+            }
+        })
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -338,130 +418,127 @@ async def dividend(
         if div_growth is not None and div_growth < 0:
             return JSONResponse({"error": "Dividend growth cannot be negative!"}, status_code=400)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://openexchangerates.org/api/latest.json?app_id={API_KEY_ER}")
-            data = response.json()
-            rates = data['rates']
-
-            if from_currency not in rates:
-                return JSONResponse({"error": "Currency is not supported!"}, status_code=400)
-
-            usd_rate = rates[from_currency]
-            price_of_1_share_usd = price_of_1_share / usd_rate
-            div_per_1_share_usd = div_per_1_share / usd_rate
-            period_multiplier = 12 if pay_period == "month" else 1
-
-            tax_percent = tax_rate / 100 if tax_rate else 0
-            growth_percent = div_growth / 100 if div_growth else 0
-
-            total_div = 0
-            div_yield = 0
-            total_div_yield = 0
-            invest = 0
-            div_income_1_asset = 0
-            div_income_all_assets = 0
-            div_income_total = 0
-            ann_div_yield = 0
-            tot_div_inc = 0
-            total_period_div_yield = 0
-            total_return = 0
-            ave_ann_ret = 0
-
-            beginning_value = price_of_1_share_usd * number_of_shares
-            annual_div_per_share_basic = div_per_1_share_usd * period_multiplier
-            div_income_1_asset_basic = annual_div_per_share_basic
-            div_income_all_assets_basic = div_income_1_asset_basic * number_of_shares
-
-            if not tax_rate and not div_growth:
-                annual_div_per_share = annual_div_per_share_basic
+        matrix = await rates_cache.get_matrix()
+
+        if from_currency not in matrix:
+            return JSONResponse({"error": "Currency is not supported!"}, status_code=400)
+
+        usd_rate = matrix.rate("USD", from_currency)
+        price_of_1_share_usd = price_of_1_share / usd_rate
+        div_per_1_share_usd = div_per_1_share / usd_rate
+        period_multiplier = 12 if pay_period == "month" else 1
+
+        tax_percent = tax_rate / 100 if tax_rate else 0
+        growth_percent = div_growth / 100 if div_growth else 0
+
+        total_div = 0
+        div_yield = 0
+        total_div_yield = 0
+        invest = 0
+        div_income_1_asset = 0
+        div_income_all_assets = 0
+        div_income_total = 0
+        ann_div_yield = 0
+        tot_div_inc = 0
+        total_period_div_yield = 0
+        total_return = 0
+        ave_ann_ret = 0
+
+        beginning_value = price_of_1_share_usd * number_of_shares
+        annual_div_per_share_basic = div_per_1_share_usd * period_multiplier
+        div_income_1_asset_basic = annual_div_per_share_basic
+        div_income_all_assets_basic = div_income_1_asset_basic * number_of_shares
+
+        if not tax_rate and not div_growth:
+            annual_div_per_share = annual_div_per_share_basic
+            total_div_per_share = annual_div_per_share * own_period
+            total_div = total_div_per_share * number_of_shares
+            div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_div_yield = (total_div / beginning_value) * 100
+            invest = beginning_value
+            div_income_1_asset = div_income_1_asset_basic
+            div_income_all_assets = div_income_all_assets_basic
+            div_income_total = div_income_all_assets * own_period
+            ending_value = beginning_value + div_income_total
+            if own_period > 0 and beginning_value > 0:
+                ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
+
+        elif tax_rate and not div_growth:
+            annual_div_per_share = annual_div_per_share_basic * (1 - tax_percent)
+            total_div_per_share = annual_div_per_share * own_period
+            total_div = total_div_per_share * number_of_shares
+            div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_div_yield = (total_div / beginning_value) * 100
+            x = annual_div_per_share_basic * tax_percent
+            y = annual_div_per_share_basic - x
+            ann_div_yield = (y / price_of_1_share_usd) * 100
+            div_income_total = total_div
+            ending_value = beginning_value + div_income_total
+            if own_period > 0 and beginning_value > 0:
+                ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
+
+        elif not tax_rate and div_growth:
+            annual_div_per_share = annual_div_per_share_basic
+
+            if growth_percent > 0:
+                total_div_per_share = annual_div_per_share * (
+                            ((1 + growth_percent) ** own_period - 1) / growth_percent)
+            else:
                 total_div_per_share = annual_div_per_share * own_period
-                total_div = total_div_per_share * number_of_shares
-                div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_div_yield = (total_div / beginning_value) * 100
-                invest = beginning_value
-                div_income_1_asset = div_income_1_asset_basic
-                div_income_all_assets = div_income_all_assets_basic
-                div_income_total = div_income_all_assets * own_period
-                ending_value = beginning_value + div_income_total
-                if own_period > 0 and beginning_value > 0:
-                    ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
-
-            elif tax_rate and not div_growth:
-                annual_div_per_share = annual_div_per_share_basic * (1 - tax_percent)
+            total_div = total_div_per_share * number_of_shares
+            div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_div_yield = (total_div / beginning_value) * 100
+            tot_div_inc = (div_income_all_assets_basic * (((
+                                                                       1 + growth_percent) ** own_period) - 1)) / growth_percent if growth_percent > 0 else div_income_all_assets_basic * own_period
+            ann_div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_period_div_yield = (tot_div_inc / beginning_value) * 100
+            total_return = total_period_div_yield
+            div_income_total = tot_div_inc
+            ending_value = beginning_value + div_income_total
+            if own_period > 0 and beginning_value > 0:
+                ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
+
+        elif tax_rate and div_growth:
+            annual_div_per_share = annual_div_per_share_basic * (1 - tax_percent)
+
+            if growth_percent > 0:
+                total_div_per_share = annual_div_per_share * (
+                            ((1 + growth_percent) ** own_period - 1) / growth_percent)
+            else:
                 total_div_per_share = annual_div_per_share * own_period
-                total_div = total_div_per_share * number_of_shares
-                div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_div_yield = (total_div / beginning_value) * 100
-                x = annual_div_per_share_basic * tax_percent
-                y = annual_div_per_share_basic - x
-                ann_div_yield = (y / price_of_1_share_usd) * 100
-                div_income_total = total_div
-                ending_value = beginning_value + div_income_total
-                if own_period > 0 and beginning_value > 0:
-                    ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
-
-            elif not tax_rate and div_growth:
-                annual_div_per_share = annual_div_per_share_basic
-
-                if growth_percent > 0:
-                    total_div_per_share = annual_div_per_share * (
-                                ((1 + growth_percent) ** own_period - 1) / growth_percent)
-                else:
-                    total_div_per_share = annual_div_per_share * own_period
-                total_div = total_div_per_share * number_of_shares
-                div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_div_yield = (total_div / beginning_value) * 100
-                tot_div_inc = (div_income_all_assets_basic * (((
-                                                                           1 + growth_percent) ** own_period) - 1)) / growth_percent if growth_percent > 0 else div_income_all_assets_basic * own_period
-                ann_div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_period_div_yield = (tot_div_inc / beginning_value) * 100
-                total_return = total_period_div_yield
-                div_income_total = tot_div_inc
-                ending_value = beginning_value + div_income_total
-                if own_period > 0 and beginning_value > 0:
-                    ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
-
-            elif tax_rate and div_growth:
-                annual_div_per_share = annual_div_per_share_basic * (1 - tax_percent)
-
-                if growth_percent > 0:
-                    total_div_per_share = annual_div_per_share * (
-                                ((1 + growth_percent) ** own_period - 1) / growth_percent)
-                else:
-                    total_div_per_share = annual_div_per_share * own_period
-                total_div = total_div_per_share * number_of_shares
-                div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_div_yield = (total_div / beginning_value) * 100
-                total_return = total_div_yield
-                div_income_1_asset = div_income_1_asset_basic
-                div_after_tax = div_income_1_asset * (1 - tax_percent)
-                ann_div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
-                total_period_div_yield = (total_div / beginning_value) * 100
-                div_income_total = total_div
-                ending_value = beginning_value + div_income_total
-                if own_period > 0 and beginning_value > 0:
-                    ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
-
-            total_div_original = total_div * usd_rate
-            invest_original = invest * usd_rate
-            tot_div_inc_original = tot_div_inc * usd_rate
-            div_income_total_original = div_income_total * usd_rate
+            total_div = total_div_per_share * number_of_shares
+            div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_div_yield = (total_div / beginning_value) * 100
+            total_return = total_div_yield
+            div_income_1_asset = div_income_1_asset_basic
+            div_after_tax = div_income_1_asset * (1 - tax_percent)
+            ann_div_yield = (annual_div_per_share / price_of_1_share_usd) * 100
+            total_period_div_yield = (total_div / beginning_value) * 100
+            div_income_total = total_div
+            ending_value = beginning_value + div_income_total
+            if own_period > 0 and beginning_value > 0:
+                ave_ann_ret = ((ending_value / beginning_value) ** (1 / own_period) - 1) * 100
+
+        total_div_original = total_div * usd_rate
+        invest_original = invest * usd_rate
+        tot_div_inc_original = tot_div_inc * usd_rate
+        div_income_total_original = div_income_total * usd_rate
 
-            return JSONResponse({
-                "status": "success",
-                "result": {
-                    "total_div": total_div_original,
-                    "div_yield": div_yield,
-                    "total_div_yield": total_div_yield,
-                    "invest": invest_original,
-                    "div_income_total": div_income_total_original,
-                    "ave_ann_ret": ave_ann_ret,
-                    "ann_div_yield": ann_div_yield,
-                    "tot_div_inc": tot_div_inc_original,
-                    "total_period_div_yield": total_period_div_yield,
-                    "total_return": total_return
-                }
-            })
+        return JSONResponse({
+            "status": "success",
+            "result": {
+                "total_div": total_div_original,
+                "div_yield": div_yield,
+                "total_div_yield": total_div_yield,
+                "invest": invest_original,
+                "div_income_total": div_income_total_original,
+                "ave_ann_ret": ave_ann_ret,
+                "ann_div_yield": ann_div_yield,
+                "tot_div_inc": tot_div_inc_original,
+                "total_period_div_yield": total_period_div_yield,
+                "total_return": total_return
+            }
+        })
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -542,13 +619,18 @@ async def rrr(
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+async def save_calculation(save, table, **values):
+    if write_buffer.running:
+        return await write_buffer.submit(table, values)
+    return await run_db(save, **values)
+
 @app.post("/save_pl")
 async def save_pl(
         request: Request,
         trade_data: dict = Body(...)
 ):
     try:
-        user = get_current_user(request)
+        user = await get_current_user(request)
         if not user:
             return JSONResponse({"error": "You must be logged in to save trades"}, status_code=401)
 
@@ -563,7 +645,9 @@ async def save_pl(
         profit_loss_yield = trade_data.get('profit_loss_yield', 0)
         margin = trade_data.get('margin')
 
-        calculation_id = SavedCalculations.save_profit_loss(
+        calculation_id = await save_calculation(
+            SavedCalculations.save_profit_loss,
+            "saved_profit_loss",
             user_id=user.id,
             title=trade_data.get('title', 'Untitled Trade'),
             calculation_date=trade_data.get('date'),
@@ -583,6 +667,8 @@ async def save_pl(
             "success": f"Trade '{trade_data.get('title', 'Untitled')}' saved successfully!",
             "calculation_id": calculation_id
         })
+    except WriteBufferFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -592,7 +678,7 @@ async def save_div(
         div_data: dict = Body(...)
 ):
     try:
-        user = get_current_user(request)
+        user = await get_current_user(request)
         if not user:
             return JSONResponse({"error": "You must be logged in to save dividend calculations"}, status_code=401)
 
@@ -613,7 +699,9 @@ async def save_div(
         total_return = div_data.get('total_return', 0)
         ave_ann_ret = div_data.get('ave_ann_ret', 0)
 
-        calculation_id = SavedCalculations.save_dividend(
+        calculation_id = await save_calculation(
+            SavedCalculations.save_dividend,
+            "saved_dividend",
             user_id=user.id,
             title=div_data.get('title', 'Untitled Dividend Calculation'),
             calculation_date=div_data.get('date'),
@@ -639,6 +727,8 @@ async def save_div(
             "success": f"Trade '{div_data.get('title', 'Untitled')}' saved successfully!",
             "calculation_id": calculation_id
         })
+    except WriteBufferFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -648,7 +738,7 @@ async def save_rrr(
         rrr_data: dict = Body(...)
 ):
     try:
-        user = get_current_user(request)
+        user = await get_current_user(request)
         if not user:
             return JSONResponse({"error": "You must be logged in to save RRR calculations"}, status_code=401)
 
@@ -667,7 +757,9 @@ async def save_rrr(
         balance_after_profit = rrr_data.get('balance_after_profit', 0)
         balance_after_loss = rrr_data.get('balance_after_loss', 0)
 
-        calculation_id = SavedCalculations.save_rrr(
+        calculation_id = await save_calculation(
+            SavedCalculations.save_rrr,
+            "saved_rrr",
             user_id=user.id,
             title=rrr_data.get('title', 'Untitled RRR Calculation'),
             calculation_date=rrr_data.get('date'),
@@ -691,56 +783,223 @@ async def save_rrr(
             "success": f"Trade '{rrr_data.get('title', 'Untitled')}' saved successfully!",
             "calculation_id": calculation_id
         })
+    except WriteBufferFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+def page_limit(limit):
+    if limit is None:
+        return SAVED_PAGE_SIZE
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, SAVED_MAX_PAGE_SIZE)
+
+async def portfolio_etag(request, user):
+    try:
+        version = await run_db(SavedCalculations.get_user_version, user.id)
+    except Exception as e:
+        print(f"Error reading portfolio version: {e}")
+        return None
+    variant = hashlib.sha1(f"{user.id}:{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+    return f'"{version}-{variant}"'
+
+def etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if etag is None or not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def etag_headers(etag):
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def columnar_shape(shape):
+    if shape not in ("rows", "columns"):
+        raise ValueError("shape must be 'rows' or 'columns'")
+    return shape == "columns"
+
+@app.post("/api/import/{kind}")
+async def import_calculations(
+        request: Request,
+        kind: str,
+        file: UploadFile = File(...),
+        format: Optional[str] = None,
+        skip_invalid: bool = False
+):
+    user = await get_current_user(request)
+    if not user:
+        return JSONResponse({"error": "You must be logged in to import calculations"}, status_code=401)
+    if kind not in IMPORT_SPECS:
+        return JSONResponse({"error": f"Unknown calculation type: {kind}"}, status_code=404)
+
+    file_format = format or detect_format(file.filename, file.content_type)
+    if file_format is None:
+        return JSONResponse({"error": "Could not detect file format, pass format=csv or format=ndjson"}, status_code=400)
+
+    try:
+        result = await run_db(import_file, kind, user.id, file.file, file_format, skip_invalid)
+        return JSONResponse({"success": True, **result})
+    except ImportRejected as e:
+        return JSONResponse({
+            "error": str(e),
+            "error_count": e.error_count,
+            "errors": e.errors
+        }, status_code=422)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        await file.close()
+
+@app.get("/api/portfolio")
+async def get_portfolio(request: Request, limit: Optional[int] = None, shape: str = "rows"):
+
+    user = await get_current_user(request)
+    if not user:
+        return JSONResponse({"error": "Authentication required"}, status_code=401)
+
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
+    try:
+        limit = page_limit(limit)
+        columnar = columnar_shape(shape)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        portfolio = await run_db(SavedCalculations.get_user_portfolio, user.id, limit, columnar)
+        return JSONResponse({
+            "success": True,
+            **portfolio
+        }, headers=etag_headers(etag))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.get("/api/portfolio/summary")
+async def get_portfolio_summary(request: Request):
+
+    user = await get_current_user(request)
+    if not user:
+        return JSONResponse({"error": "Authentication required"}, status_code=401)
+
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
+    try:
+        summary = await run_db(SavedCalculations.get_user_summary, user.id)
+        return JSONResponse({
+            "success": True,
+            "summary": summary
+        }, headers=etag_headers(etag))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.get("/api/portfolio/export")
+async def export_portfolio(request: Request, format: str = "ndjson"):
+
+    user = await get_current_user(request)
+    if not user:
+        return JSONResponse({"error": "Authentication required"}, status_code=401)
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": "format must be 'ndjson' or 'csv'"}, status_code=400)
+    if exports_busy():
+        return JSONResponse(
+            {"error": "Too many exports in progress, please try again shortly"},
+            status_code=503,
+            headers={"Retry-After": "5"}
+        )
+
+    filename = f"portfolio-{datetime.now().strftime('%Y%m%d')}.{format}"
+    return StreamingResponse(
+        stream_export(user.id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 
 @app.get("/get_saved_pl")
-async def get_saved_pl(request: Request):
+async def get_saved_pl(request: Request, limit: Optional[int] = None, after: Optional[str] = None, shape: str = "rows"):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculations = SavedCalculations.get_user_profit_loss_calculations(user.id)
+        limit = page_limit(limit)
+        columnar = columnar_shape(shape)
+        calculations, next_cursor = await run_db(SavedCalculations.get_user_profit_loss_calculations, user.id, limit, after, columnar)
         return JSONResponse({
             "success": True,
-            "calculations": calculations
-        })
+            "calculations": calculations,
+            "next_cursor": next_cursor
+        }, headers=etag_headers(etag))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 @app.get("/get_saved_div")
-async def get_saved_div(request: Request):
+async def get_saved_div(request: Request, limit: Optional[int] = None, after: Optional[str] = None, shape: str = "rows"):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculations = SavedCalculations.get_user_dividend_calculations(user.id)
+        limit = page_limit(limit)
+        columnar = columnar_shape(shape)
+        calculations, next_cursor = await run_db(SavedCalculations.get_user_dividend_calculations, user.id, limit, after, columnar)
         return JSONResponse({
             "success": True,
-            "calculations": calculations
-        })
+            "calculations": calculations,
+            "next_cursor": next_cursor
+        }, headers=etag_headers(etag))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 @app.get("/get_saved_rrr")
-async def get_saved_rrr(request: Request):
+async def get_saved_rrr(request: Request, limit: Optional[int] = None, after: Optional[str] = None, shape: str = "rows"):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculations = SavedCalculations.get_user_rrr_calculations(user.id)
+        limit = page_limit(limit)
+        columnar = columnar_shape(shape)
+        calculations, next_cursor = await run_db(SavedCalculations.get_user_rrr_calculations, user.id, limit, after, columnar)
         return JSONResponse({
             "success": True,
-            "calculations": calculations
-        })
+            "calculations": calculations,
+            "next_cursor": next_cursor
+        }, headers=etag_headers(etag))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -748,17 +1007,21 @@ async def get_saved_rrr(request: Request):
 @app.get("/get_pl_details")
 async def get_pl_details(request: Request, id: int):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculation = SavedCalculations.get_profit_loss_details(id, user.id)
+        calculation = await run_db(SavedCalculations.get_profit_loss_details, id, user.id)
         if calculation:
             return JSONResponse({
                 "success": True,
                 "calculation": calculation
-            })
+            }, headers=etag_headers(etag))
         else:
             return JSONResponse({"error": "Calculation not found"}, status_code=404)
     except Exception as e:
@@ -768,17 +1031,21 @@ async def get_pl_details(request: Request, id: int):
 @app.get("/get_div_details")
 async def get_div_details(request: Request, id: int):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculation = SavedCalculations.get_dividend_details(id, user.id)
+        calculation = await run_db(SavedCalculations.get_dividend_details, id, user.id)
         if calculation:
             return JSONResponse({
                 "success": True,
                 "calculation": calculation
-            })
+            }, headers=etag_headers(etag))
         else:
             return JSONResponse({"error": "Calculation not found"}, status_code=404)
     except Exception as e:
@@ -788,17 +1055,21 @@ async def get_div_details(request: Request, id: int):
 @app.get("/get_rrr_details")
 async def get_rrr_details(request: Request, id: int):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
+    etag = await portfolio_etag(request, user)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
     try:
-        calculation = SavedCalculations.get_rrr_details(id, user.id)
+        calculation = await run_db(SavedCalculations.get_rrr_details, id, user.id)
         if calculation:
             return JSONResponse({
                 "success": True,
                 "calculation": calculation
-            })
+            }, headers=etag_headers(etag))
         else:
             return JSONResponse({"error": "Calculation not found"}, status_code=404)
     except Exception as e:
@@ -808,7 +1079,7 @@ async def get_rrr_details(request: Request, id: int):
 @app.post("/delete_pl")
 async def delete_pl(request: Request, calculation_data: dict = Body(...)):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
@@ -817,7 +1088,7 @@ async def delete_pl(request: Request, calculation_data: dict = Body(...)):
         if not calculation_id:
             return JSONResponse({"error": "Calculation ID is required"}, status_code=400)
 
-        success = SavedCalculations.delete_profit_loss_calculation(calculation_id, user.id)
+        success = await run_db(SavedCalculations.delete_profit_loss_calculation, calculation_id, user.id)
         if success:
             return JSONResponse({"success": True, "message": "Calculation deleted successfully"})
         else:
@@ -829,7 +1100,7 @@ async def delete_pl(request: Request, calculation_data: dict = Body(...)):
 @app.post("/delete_div")
 async def delete_div(request: Request, calculation_data: dict = Body(...)):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
@@ -838,7 +1109,7 @@ async def delete_div(request: Request, calculation_data: dict = Body(...)):
         if not calculation_id:
             return JSONResponse({"error": "Calculation ID is required"}, status_code=400)
 
-        success = SavedCalculations.delete_dividend_calculation(calculation_id, user.id)
+        success = await run_db(SavedCalculations.delete_dividend_calculation, calculation_id, user.id)
         if success:
             return JSONResponse({"success": True, "message": "Calculation deleted successfully"})
         else:
@@ -850,7 +1121,7 @@ async def delete_div(request: Request, calculation_data: dict = Body(...)):
 @app.post("/delete_rrr")
 async def delete_rrr(request: Request, calculation_data: dict = Body(...)):
 
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse({"error": "Authentication required"}, status_code=401)
 
@@ -859,7 +1130,7 @@ async def delete_rrr(request: Request, calculation_data: dict = Body(...)):
         if not calculation_id:
             return JSONResponse({"error": "Calculation ID is required"}, status_code=400)
 
-        success = SavedCalculations.delete_rrr_calculation(calculation_id, user.id)
+        success = await run_db(SavedCalculations.delete_rrr_calculation, calculation_id, user.id)
         if success:
             return JSONResponse({"success": True, "message": "Calculation deleted successfully"})
         else:
@@ -871,24 +1142,124 @@ async def delete_rrr(request: Request, calculation_data: dict = Body(...)):
 async def crypto_page(request: Request):
     return templates.TemplateResponse("crypto.html", {"request": request})
 
+async def get_crypto_prices(symbols):
+    outdated = []
+    for symbol in symbols:
+        age = crypto_snapshot.age([symbol])
+        if age is None or age > MAX_PRICE_AGE:
+            outdated.append(symbol)
+
+    if outdated:
+        await refresh_prices(outdated)
+
+    prices = crypto_snapshot.prices(symbols)
+    if not prices:
+        raise HTTPException(status_code=503, detail="Crypto prices are not available yet")
+    return prices
+
 @app.get("/api/crypto")
-async def crypto_api():
+async def crypto_api(symbols: Optional[str] = None):
     try:
-        async with httpx.AsyncClient() as client:
+        if symbols is None:
+            requested = [BITCOIN, ETHEREUM]
+        else:
+            requested = []
+            for symbol in symbols.split(","):
+                symbol = symbol.strip().upper()
+                if symbol and symbol not in requested:
+                    requested.append(symbol)
+
+            if not requested:
+                return JSONResponse({"error": "At least one symbol is required!"}, status_code=400)
+            if len(requested) > CRYPTO_MAX_SYMBOLS:
+                return JSONResponse({"error": f"No more than {CRYPTO_MAX_SYMBOLS} symbols per request!"}, status_code=400)
+            if not all(symbol.isalnum() for symbol in requested):
+                return JSONResponse({"error": "Invalid symbol!"}, status_code=400)
+            unsupported = [symbol for symbol in requested if symbol not in CRYPTO_ALLOWED_SYMBOLS]
+            if unsupported:
+                return JSONResponse({"error": f"Unsupported symbols: {', '.join(unsupported)}"}, status_code=400)
+
+        prices = await get_crypto_prices(requested)
+        age = crypto_snapshot.age(list(prices))
+        status = {
+            "updated_at": crypto_snapshot.updated_at(list(prices)),
+            "age": age,
+            "stale": age > MAX_PRICE_AGE
+        }
 
-            btc = await client.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT")
-            btc_data = btc.json()
+        if symbols is None:
+            if len(prices) < len(requested):
+                raise HTTPException(status_code=503, detail="Crypto prices are not available yet")
+            return {"btc_price": prices[BITCOIN], "eth_price": prices[ETHEREUM], **status}
 
-            eth = await client.get("https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT")
-            eth_data = eth.json()
+        return {
+            "prices": prices,
+            "missing": [symbol for symbol in requested if symbol not in prices],
+            **status
+        }
+    except HTTPException:
+        raise
+    except Exception as error:
+        raise HTTPException(status_code=500, detail=str(error))
 
-            return {
-                "btc_price": float(btc_data['price']),
-                "eth_price": float(eth_data['price'])
-            }
+@app.get("/api/crypto/stats")
+async def crypto_stats_api():
+    return {
+        "mode": MARKET_DATA_MODE,
+        "stats": ticker_stream.stats
+    }
+
+@app.get("/api/klines")
+async def klines_api(symbol: str, interval: str, limit: int = 24, since: Optional[int] = None):
+    symbol = symbol.upper()
+    if symbol not in CRYPTO_SYMBOLS:
+        return JSONResponse({"error": "Symbol is not supported!"}, status_code=400)
+    if interval not in KLINE_INTERVALS:
+        return JSONResponse({"error": "Interval is not supported!"}, status_code=400)
+    if limit <= 0 or limit > KLINES_MAX_LIMIT:
+        return JSONResponse({"error": f"Limit must be between 1 and {KLINES_MAX_LIMIT}!"}, status_code=400)
+
+    try:
+        prices, stale = await candle_cache.get(symbol, interval, limit, since)
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "prices": prices,
+            "stale": stale
+        }
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
+@app.get("/api/history")
+async def history_api(
+        symbol: str,
+        interval: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: int = HISTORY_DEFAULT_LIMIT,
+        format: str = "json"
+):
+    if limit <= 0 or limit > HISTORY_MAX_LIMIT:
+        return JSONResponse({"error": f"Limit must be between 1 and {HISTORY_MAX_LIMIT}!"}, status_code=400)
+
+    try:
+        records = price_store.range(symbol.upper(), interval, start, end, limit)
+    except ValueError as error:
+        return JSONResponse({"error": str(error)}, status_code=400)
+
+    if format == "binary":
+        return Response(
+            content=memoryview(records).cast("B"),
+            media_type="application/octet-stream",
+            headers={"X-Record-Format": "ts:<i8,price:<f8"}
+        )
+
+    return {
+        "symbol": symbol.upper(),
+        "interval": interval,
+        "prices": records.tolist()
+    }
+
 @app.get("/exchange_rates_page", response_class=HTMLResponse)
 async def exchange_rates_page(request: Request):
     return templates.TemplateResponse("er.html", {"request": request})
@@ -896,31 +1267,15 @@ async def exchange_rates_page(request: Request):
 @app.get("/api/currency")
 async def currency_api():
     try:
-        async with httpx.AsyncClient() as client:
-
-            response = await client.get(f'https://openexchangerates.org/api/latest.json?app_id={API_KEY_ER}', timeout=100)
-            data = response.json()
-
-            rub_per_usd = float(data['rates']['RUB'])
-
-            eur_per_usd = float(data['rates']['EUR'])
-
-            rub_per_eur = rub_per_usd / eur_per_usd
-
-            cny_per_usd = float(data['rates']['CNY'])
-
-            rub_per_cny = rub_per_usd / cny_per_usd
-
-            chf_per_usd = float(data['rates']['CHF'])
-
-            rub_per_chf = rub_per_usd / chf_per_usd
-
-            return {
-                "usdprice": round(float(rub_per_usd), 2),
-                "eurprice": round(float(rub_per_eur), 2),
-                "cnyprice": round(float(rub_per_cny), 2),
-                "chfprice": round(float(rub_per_chf), 2)
-            }
+        matrix = await rates_cache.get_matrix()
+
+        return {
+            "usdprice": round(matrix.rate("USD", "RUB"), 2),
+            "eurprice": round(matrix.rate("EUR", "RUB"), 2),
+            "cnyprice": round(matrix.rate("CNY", "RUB"), 2),
+            "chfprice": round(matrix.rate("CHF", "RUB"), 2),
+            "stale": rates_cache.is_stale()
+        }
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
@@ -948,6 +1303,24 @@ async def get_chf_rate():
 async def stocks_page(request: Request):
     return templates.TemplateResponse("stocks.html", {"request": request})
 
+@app.get("/api/stocks")
+async def stocks_api(symbols: str = ",".join(STOCK_SYMBOLS)):
+    requested = []
+    for symbol in symbols.split(","):
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in requested:
+            requested.append(symbol)
+
+    if not requested:
+        return JSONResponse({"error": "At least one symbol is required!"}, status_code=400)
+    if len(requested) > STOCK_MAX_SYMBOLS:
+        return JSONResponse({"error": f"No more than {STOCK_MAX_SYMBOLS} symbols per request!"}, status_code=400)
+    if not all(symbol.replace(".", "").replace("-", "").isalnum() for symbol in requested):
+        return JSONResponse({"error": "Invalid symbol!"}, status_code=400)
+
+    quotes = await stock_quotes.get_many(requested)
+    return {"quotes": quotes}
+
 @app.get("/api/stocks/aapl")
 async def get_aapl_price():
     return await get_stock_price("AAPL")
@@ -965,15 +1338,67 @@ async def get_amzn_price():
     return await get_stock_price("AMZN")
 
 async def get_stock_price(symbol: str):
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={FINNHUB_API_KEY}"
-            )
-            data = response.json()
-            return {"price": round(data["c"], 2)}
-    except Exception as error:
-        raise HTTPException(status_code=500, detail=str(error))
+    quote = await stock_quotes.get(symbol)
+    if "error" in quote:
+        raise HTTPException(status_code=500, detail=quote["error"])
+    return {"price": quote["price"]}
+
+async def crypto_stream_payload():
+    prices = crypto_snapshot.prices()
+    if not prices:
+        return None
+    return {
+        "prices": prices,
+        "updated_at": crypto_snapshot.updated_at()
+    }
+
+async def stocks_stream_payload():
+    quotes = await stock_quotes.get_many(STOCK_SYMBOLS)
+    return {symbol: quote.get("price") for symbol, quote in quotes.items()}
+
+price_broadcaster.add_source("crypto", crypto_stream_payload, STREAM_CRYPTO_INTERVAL)
+price_broadcaster.add_source("fx", currency_api, STREAM_FX_INTERVAL)
+price_broadcaster.add_source("stocks", stocks_stream_payload, STREAM_STOCKS_INTERVAL)
+
+@app.get("/stream/prices")
+async def stream_prices(request: Request, topics: str = ",".join(TOPICS)):
+    requested = [topic.strip() for topic in topics.split(",") if topic.strip() in TOPICS]
+    if not requested:
+        return JSONResponse({"error": "Unknown topics"}, status_code=400)
+
+    subscriber = price_broadcaster.subscribe(requested)
+    if subscriber is None:
+        return JSONResponse({"error": "Too many open price streams"}, status_code=503)
+
+    return StreamingResponse(
+        price_broadcaster.events(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not METRICS_TOKEN or not secrets.compare_digest(token, METRICS_TOKEN):
+        return JSONResponse({"error": "Not found"}, status_code=404)
+
+    return {
+        "rates_cache": rates_cache.stats(),
+        "candle_cache": candle_cache.stats(),
+        "stock_quotes": stock_quotes.stats(),
+        "price_store": price_store.stats(),
+        "crypto_refresh": refresh_metrics(),
+        "circuit_breakers": {name: breaker.metrics() for name, breaker in breakers.items()},
+        "quota_budgets": {name: budget.metrics() for name, budget in budgets.items()},
+        "db_pool": pool.metrics(),
+        "prepared_statements": pool.statements.metrics(),
+        "db_executor": executor_metrics(),
+        "write_buffer": write_buffer.metrics(),
+        "sessions": session_store.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "ticker_stream": ticker_stream.metrics(),
+        "price_stream": price_broadcaster.metrics()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import asyncio
+import httpx
+from dotenv import load_dotenv
+from upstream import BINANCE, upstream_get, budgets
+from timeseries import price_store
+
+load_dotenv()
+
+CRYPTO_SYMBOLS = [s.strip().upper() for s in os.getenv('CRYPTO_SYMBOLS', 'BTCUSDT,ETHUSDT').split(',') if s.strip()]
+CRYPTO_ALLOWED_SYMBOLS = CRYPTO_SYMBOLS + [
+    s.strip().upper() for s in os.getenv('CRYPTO_ALLOWED_SYMBOLS', '').split(',')
+    if s.strip() and s.strip().upper() not in CRYPTO_SYMBOLS
+]
+CRYPTO_REJECTED_TTL = float(os.getenv('CRYPTO_REJECTED_TTL', 3600))
+
+class PriceSnapshot:
+    def __init__(self):
+        self._prices = {}
+
+    def update(self, prices, updated_at=None):
+        if updated_at is None:
+            updated_at = time.time()
+        merged = dict(self._prices)
+        for symbol, price in prices.items():
+            merged[symbol] = (price, updated_at)
+        self._prices = merged
+
+    def get(self, symbol):
+        return self._prices.get(symbol)
+
+    def prices(self, symbols=None):
+        current = self._prices
+        if symbols is None:
+            symbols = current.keys()
+        return {symbol: current[symbol][0] for symbol in symbols if symbol in current}
+
+    def updated_at(self, symbols=None):
+        current = self._prices
+        if symbols is None:
+            symbols = current.keys()
+        stamps = [current[symbol][1] for symbol in symbols if symbol in current]
+        return min(stamps) if stamps else None
+
+    def age(self, symbols=None):
+        updated_at = self.updated_at(symbols)
+        if updated_at is None:
+            return None
+        return time.time() - updated_at
+
+crypto_snapshot = PriceSnapshot()
+
+_rejected_symbols = {}
+_refreshing = {}
+
+def is_rejected(symbol, now=None):
+    now = time.time() if now is None else now
+    return _rejected_symbols.get(symbol, 0) > now
+
+async def fetch_price(symbol):
+    try:
+        response = await upstream_get(BINANCE, "/api/v3/ticker/price", {"symbol": symbol})
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 400:
+            _rejected_symbols[symbol] = time.time() + CRYPTO_REJECTED_TTL
+        raise
+    return float(response.json()["price"])
+
+async def fetch_prices(symbols):
+    try:
+        response = await upstream_get(
+            BINANCE,
+            "/api/v3/ticker/price",
+            {"symbols": json.dumps(symbols, separators=(",", ":"))}
+        )
+        return {item["symbol"]: float(item["price"]) for item in response.json()}
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 400 or len(symbols) == 1:
+            raise
+
+    results = await asyncio.gather(*[fetch_price(symbol) for symbol in symbols], return_exceptions=True)
+    prices = {symbol: price for symbol, price in zip(symbols, results) if not isinstance(price, Exception)}
+    if not prices:
+        raise next(result for result in results if isinstance(result, Exception))
+    return prices
+
+async def check_prices(symbols=None):
+    if symbols is None:
+        symbols = CRYPTO_SYMBOLS
+    now = time.time()
+    symbols = [symbol for symbol in symbols if not is_rejected(symbol, now)]
+    if not symbols:
+        return None
+    try:
+        if len(symbols) == 1:
+            prices = {symbols[0]: await fetch_price(symbols[0])}
+        else:
+            prices = await fetch_prices(list(symbols))
+
+        updated_at = time.time()
+        crypto_snapshot.update(prices, updated_at)
+        for symbol, price in prices.items():
+            price_store.append(symbol, "tick", int(updated_at * 1000), price)
+        return prices
+    except Exception as e:
+        print(f"Error fetching prices: {e}")
+        return None
+
+def _refreshed(symbols, task):
+    for symbol in symbols:
+        if _refreshing.get(symbol) is task:
+            del _refreshing[symbol]
+
+async def refresh_prices(symbols):
+    now = time.time()
+    tasks = set()
+    missing = []
+    for symbol in symbols:
+        if is_rejected(symbol, now):
+            continue
+        task = _refreshing.get(symbol)
+        if task is None:
+            missing.append(symbol)
+        else:
+            tasks.add(task)
+
+    if missing:
+        task = asyncio.create_task(check_prices(missing))
+        for symbol in missing:
+            _refreshing[symbol] = task
+        task.add_done_callback(lambda done: _refreshed(missing, done))
+        tasks.add(task)
+
+    if tasks:
+        await asyncio.wait(tasks)
+
+def refresh_metrics():
+    now = time.time()
+    return {
+        "refreshing": len(_refreshing),
+        "rejected_symbols": sorted(symbol for symbol in _rejected_symbols if is_rejected(symbol, now))
+    }
+
+async def poll_prices(interval):
+    while True:
+        await check_prices()
+        await asyncio.sleep(budgets[BINANCE].scaled(interval))
+
+_poller = None
+
+def start_poller(interval):
+    global _poller
+    if _poller is None or _poller.done():
+        _poller = asyncio.create_task(poll_prices(interval))
+    return _poller
+
+async def stop_poller():
+    global _poller
+    if _poller is None:
+        return
+    _poller.cancel()
+    try:
+        await _poller
+    except asyncio.CancelledError:
+        pass
+    _poller = None
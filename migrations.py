@@ -0,0 +1,66 @@
+from database import db_conn
+from summary import migration_statements as summary_migration
+from versions import migration_statements as versions_migration
+
+MIGRATION_LOCK_ID = 72150001
+
+MIGRATIONS = [
+    (1, "saved_calculations_user_created_at_indexes", [
+        "CREATE INDEX IF NOT EXISTS saved_profit_loss_user_created_at "
+        "ON saved_profit_loss (user_id, created_at DESC, calculation_id DESC)",
+        "CREATE INDEX IF NOT EXISTS saved_dividend_user_created_at "
+        "ON saved_dividend (user_id, created_at DESC, calculation_id DESC)",
+        "CREATE INDEX IF NOT EXISTS saved_rrr_user_created_at "
+        "ON saved_rrr (user_id, created_at DESC, calculation_id DESC)",
+    ]),
+    (2, "portfolio_summary", summary_migration()),
+    (3, "portfolio_versions", versions_migration()),
+]
+
+def current_version(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+def migrate(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )"""
+        )
+        version = current_version(cursor)
+        applied = []
+        for number, name, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (number, name)
+            )
+            applied.append(number)
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def run_migrations():
+    conn = db_conn()
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    for number in applied:
+        print(f"Applied migration {number}")
+    return applied
+
+if __name__ == "__main__":
+    run_migrations()
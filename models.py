@@ -1,6 +1,10 @@
-from database import db_conn
-import bcrypt
+from database import pool
+import psycopg2
+from psycopg2.extras import execute_values
+from row_mapping import PROFIT_LOSS, DIVIDEND, RRR
+from summary import build_summary
 from datetime import datetime
+import base64
 
 class User:
     def __init__(self, user_id, username, email=None):
@@ -9,11 +13,12 @@ class User:
         self.email = email
 
     @staticmethod
-    def get_user_by_credentials(email, password):
-        conn = db_conn()
+    def get_user_with_password_hash(email):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "SELECT user_id, username, password_hash, email FROM users WHERE email = %s",
                 (email,)
             )
@@ -21,19 +26,19 @@ class User:
 
             if user_data:
                 user_id, username, stored_hash, user_email = user_data
-                if bcrypt.checkpw(password.encode(), stored_hash.encode()):
-                    return User(user_id, username, user_email)
+                return User(user_id, username, user_email), stored_hash
             return None
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
     def get_user_by_id(user_id):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "SELECT user_id, username, email FROM users WHERE user_id = %s",
                 (user_id,)
             )
@@ -43,32 +48,32 @@ class User:
             return None
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def create_user(username, email, password):
-        conn = db_conn()
+    def create_user(username, email, password_hash):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(password.encode(), salt)
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
-                (username, email, hashed_password.decode())
+                (username, email, password_hash)
             )
             conn.commit()
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
 class SavedCalculations:
 
     @staticmethod
     def save_profit_loss(user_id, title, calculation_date, asset_type, open_price, close_price, amount, volume, leverage, position_size, profit_loss, profit_loss_yield, margin):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 """INSERT INTO saved_profit_loss (user_id, title, calculation_date, asset_type, open_price, close_price, amount, volume, leverage, position_size, profit_loss, profit_loss_yield, margin)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING calculation_id""",
@@ -79,14 +84,15 @@ class SavedCalculations:
             return calculation_id
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
     def save_dividend(user_id, title, calculation_date, price_of_1_share, from_currency, number_of_shares, div_per_1_share, pay_period, own_period, tax_rate, div_growth, total_div, div_yield, total_div_yield, invest, ann_div_yield, total_period_div_yield, total_return, ave_ann_ret):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 """INSERT INTO saved_dividend (user_id, title, calculation_date, price_of_1_share, from_currency, number_of_shares, div_per_1_share, pay_period, own_period, tax_rate, div_growth, total_div, div_yield, total_div_yield, invest, ann_div_yield, total_period_div_yield, total_return, ave_ann_ret)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING calculation_id""",
@@ -97,14 +103,15 @@ class SavedCalculations:
             return calculation_id
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
     def save_rrr(user_id, title, calculation_date, open_price, take_profit, stop_loss, balance, risk_per_trade, position_size, position_cost, rrr, profit_per_share, risk_per_share, total_profit, total_risk, balance_after_profit, balance_after_loss):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 """INSERT INTO saved_rrr (user_id, title, calculation_date, open_price, take_profit, stop_loss, balance, risk_per_trade, position_size, position_cost, rrr, profit_per_share, risk_per_share, total_profit, total_risk, balance_after_profit, balance_after_loss)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING calculation_id""",
@@ -115,274 +122,229 @@ class SavedCalculations:
             return calculation_id
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def _serialize_date(date_obj):
+    def save_many(batches):
+        conn = pool.getconn()
+        cursor = conn.cursor()
+        try:
+            try:
+                results = []
+                for table, columns, rows in batches:
+                    inserted = execute_values(
+                        cursor,
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s RETURNING calculation_id",
+                        rows,
+                        page_size=len(rows),
+                        fetch=True
+                    )
+                    results.append([row[0] for row in inserted])
+            except psycopg2.Error:
+                conn.rollback()
+                results = SavedCalculations._save_rows(cursor, batches)
+            conn.commit()
+            return results
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            pool.putconn(conn)
 
-        if date_obj is None:
-            return None
-        if isinstance(date_obj, datetime):
-            return date_obj.isoformat()
-        if isinstance(date_obj, str):
+    @staticmethod
+    def _save_rows(cursor, batches):
+        results = []
+        for table, columns, rows in batches:
+            sql = (
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))}) RETURNING calculation_id"
+            )
+            saved = []
+            for row in rows:
+                cursor.execute("SAVEPOINT save_row")
+                try:
+                    cursor.execute(sql, row)
+                    saved.append(cursor.fetchone()[0])
+                    cursor.execute("RELEASE SAVEPOINT save_row")
+                except psycopg2.Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT save_row")
+                    saved.append(e)
+            results.append(saved)
+        return results
 
-            return date_obj
+    @staticmethod
+    def encode_cursor(created_at, calculation_id):
+        raw = f"{created_at.isoformat()}|{calculation_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(value):
+        try:
+            raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+            created_at, calculation_id = raw.split('|')
+            return datetime.fromisoformat(created_at), int(calculation_id)
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
 
-        return str(date_obj)
+    @staticmethod
+    def _fetch_page(cursor, spec, user_id, limit=None, after=None, columnar=False):
+        params = [user_id]
+        keyset = ""
+        if after:
+            keyset = " AND (created_at, calculation_id) < (%s, %s)"
+            params.extend(SavedCalculations.decode_cursor(after))
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = " LIMIT %s"
+            params.append(limit + 1)
+
+        pool.statements.execute(
+            cursor,
+            f"""SELECT {spec.select_list}
+            FROM {spec.table}
+            WHERE user_id = %s{keyset}
+            ORDER BY created_at DESC, calculation_id DESC{limit_clause}""",
+            params
+        )
+        rows = cursor.fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = SavedCalculations.encode_cursor(rows[-1][spec.index('created_at')], rows[-1][0])
+        calculations = spec.columnar(rows) if columnar else spec.convert_rows(rows)
+        return calculations, next_cursor
 
     @staticmethod
-    def get_user_profit_loss_calculations(user_id):
-        conn = db_conn()
+    def _list(spec, user_id, limit=None, after=None, columnar=False):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, calculation_date, asset_type, 
-                open_price, close_price, amount, volume, leverage, position_size, 
-                profit_loss, profit_loss_yield, margin, created_at
-                FROM saved_profit_loss 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC""",
-                (user_id,)
-            )
-            calculations = []
-            for row in cursor.fetchall():
-                calculations.append({
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'asset_type': row[3],
-                    'open_price': float(row[4]) if row[4] is not None else None,
-                    'close_price': float(row[5]) if row[5] is not None else None,
-                    'amount': float(row[6]) if row[6] is not None else None,
-                    'volume': row[7],
-                    'leverage': float(row[8]) if row[8] is not None else None,
-                    'position_size': float(row[9]) if row[9] is not None else None,
-                    'profit_loss': float(row[10]) if row[10] is not None else None,
-                    'profit_loss_yield': float(row[11]) if row[11] is not None else None,
-                    'margin': float(row[12]) if row[12] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[13])
-                })
-            return calculations
+            return SavedCalculations._fetch_page(cursor, spec, user_id, limit, after, columnar)
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def get_user_dividend_calculations(user_id):
-        conn = db_conn()
+    def _details(spec, calculation_id, user_id):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, 
-                       TO_CHAR(calculation_date, 'YYYY-MM-DD HH24:MI:SS'), 
-                       price_of_1_share, from_currency, number_of_shares, 
-                       div_per_1_share, pay_period, own_period, tax_rate, 
-                       div_growth, total_div, div_yield, total_div_yield, 
-                       invest, ann_div_yield, total_period_div_yield, 
-                       total_return, ave_ann_ret, 
-                       TO_CHAR(created_at, 'YYYY-MM-DD HH24:MI:SS')
-                FROM saved_dividend 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC""",
-                (user_id,)
+            pool.statements.execute(
+                cursor,
+                f"""SELECT {spec.select_list}
+                FROM {spec.table}
+                WHERE calculation_id = %s AND user_id = %s""",
+                (calculation_id, user_id)
             )
-            calculations = []
-            for row in cursor.fetchall():
-                calculations.append({
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'price_of_1_share': float(row[3]) if row[3] is not None else None,
-                    'from_currency': row[4],
-                    'number_of_shares': float(row[5]) if row[5] is not None else None,
-                    'div_per_1_share': float(row[6]) if row[6] is not None else None,
-                    'pay_period': row[7],
-                    'own_period': float(row[8]) if row[8] is not None else None,
-                    'tax_rate': float(row[9]) if row[9] is not None else None,
-                    'div_growth': float(row[10]) if row[10] is not None else None,
-                    'total_div': float(row[11]) if row[11] is not None else None,
-                    'div_yield': float(row[12]) if row[12] is not None else None,
-                    'total_div_yield': float(row[13]) if row[13] is not None else None,
-                    'invest': float(row[14]) if row[14] is not None else None,
-                    'ann_div_yield': float(row[15]) if row[15] is not None else None,
-                    'total_period_div_yield': float(row[16]) if row[16] is not None else None,
-                    'total_return': float(row[17]) if row[17] is not None else None,
-                    'ave_ann_ret': float(row[18]) if row[18] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[19])
-                })
-            return calculations
+            row = cursor.fetchone()
+            if row:
+                return spec.convert(row)
+            return None
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
+
+    @staticmethod
+    def get_user_profit_loss_calculations(user_id, limit=None, after=None, columnar=False):
+        return SavedCalculations._list(PROFIT_LOSS, user_id, limit, after, columnar)
 
     @staticmethod
-    def get_user_rrr_calculations(user_id):
-        conn = db_conn()
+    def get_user_dividend_calculations(user_id, limit=None, after=None, columnar=False):
+        return SavedCalculations._list(DIVIDEND, user_id, limit, after, columnar)
+
+    @staticmethod
+    def get_user_rrr_calculations(user_id, limit=None, after=None, columnar=False):
+        return SavedCalculations._list(RRR, user_id, limit, after, columnar)
+
+    @staticmethod
+    def get_user_portfolio(user_id, limit=None, columnar=False):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, calculation_date, open_price, 
-                take_profit, stop_loss, balance, risk_per_trade, position_size, 
-                position_cost, rrr, profit_per_share, risk_per_share, total_profit, 
-                total_risk, balance_after_profit, balance_after_loss, created_at
-                FROM saved_rrr 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC""",
-                (user_id,)
-            )
-            calculations = []
-            for row in cursor.fetchall():
-                calculations.append({
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'open_price': float(row[3]) if row[3] is not None else None,
-                    'take_profit': float(row[4]) if row[4] is not None else None,
-                    'stop_loss': float(row[5]) if row[5] is not None else None,
-                    'balance': float(row[6]) if row[6] is not None else None,
-                    'risk_per_trade': float(row[7]) if row[7] is not None else None,
-                    'position_size': float(row[8]) if row[8] is not None else None,
-                    'position_cost': float(row[9]) if row[9] is not None else None,
-                    'rrr': float(row[10]) if row[10] is not None else None,
-                    'profit_per_share': float(row[11]) if row[11] is not None else None,
-                    'risk_per_share': float(row[12]) if row[12] is not None else None,
-                    'total_profit': float(row[13]) if row[13] is not None else None,
-                    'total_risk': float(row[14]) if row[14] is not None else None,
-                    'balance_after_profit': float(row[15]) if row[15] is not None else None,
-                    'balance_after_loss': float(row[16]) if row[16] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[17])
-                })
-            return calculations
+            portfolio = {'next_cursors': {}}
+            for key, spec in (('profit_loss', PROFIT_LOSS), ('dividend', DIVIDEND), ('rrr', RRR)):
+                portfolio[key], portfolio['next_cursors'][key] = SavedCalculations._fetch_page(
+                    cursor, spec, user_id, limit, columnar=columnar
+                )
+            return portfolio
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def get_profit_loss_details(calculation_id, user_id):
-        conn = db_conn()
+    def get_user_version(user_id):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, calculation_date, asset_type, 
-                open_price, close_price, amount, volume, leverage, position_size, 
-                profit_loss, profit_loss_yield, margin, created_at
-                FROM saved_profit_loss 
-                WHERE calculation_id = %s AND user_id = %s""",
-                (calculation_id, user_id)
-            )
+            pool.statements.execute(cursor, "SELECT version FROM portfolio_versions WHERE user_id = %s", (user_id,))
             row = cursor.fetchone()
-            if row:
-                return {
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'asset_type': row[3],
-                    'open_price': float(row[4]) if row[4] is not None else None,
-                    'close_price': float(row[5]) if row[5] is not None else None,
-                    'amount': float(row[6]) if row[6] is not None else None,
-                    'volume': row[7],
-                    'leverage': float(row[8]) if row[8] is not None else None,
-                    'position_size': float(row[9]) if row[9] is not None else None,
-                    'profit_loss': float(row[10]) if row[10] is not None else None,
-                    'profit_loss_yield': float(row[11]) if row[11] is not None else None,
-                    'margin': float(row[12]) if row[12] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[13])
-                }
-            return None
+            return row[0] if row else 0
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def get_dividend_details(calculation_id, user_id):
-        conn = db_conn()
+    def get_user_summary(user_id):
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, calculation_date, price_of_1_share, 
-                from_currency, number_of_shares, div_per_1_share, pay_period, own_period, 
-                tax_rate, div_growth, total_div, div_yield, total_div_yield, invest, 
-                ann_div_yield, total_period_div_yield, total_return, ave_ann_ret, created_at
-                FROM saved_dividend 
-                WHERE calculation_id = %s AND user_id = %s""",
-                (calculation_id, user_id)
+            pool.statements.execute(
+                cursor,
+                """SELECT kind, asset_type, count, wins, total, metric_sum, metric_count
+                FROM portfolio_summary
+                WHERE user_id = %s""",
+                (user_id,)
             )
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'price_of_1_share': float(row[3]) if row[3] is not None else None,
-                    'from_currency': row[4],
-                    'number_of_shares': float(row[5]) if row[5] is not None else None,
-                    'div_per_1_share': float(row[6]) if row[6] is not None else None,
-                    'pay_period': row[7],
-                    'own_period': float(row[8]) if row[8] is not None else None,
-                    'tax_rate': float(row[9]) if row[9] is not None else None,
-                    'div_growth': float(row[10]) if row[10] is not None else None,
-                    'total_div': float(row[11]) if row[11] is not None else None,
-                    'div_yield': float(row[12]) if row[12] is not None else None,
-                    'total_div_yield': float(row[13]) if row[13] is not None else None,
-                    'invest': float(row[14]) if row[14] is not None else None,
-                    'ann_div_yield': float(row[15]) if row[15] is not None else None,
-                    'total_period_div_yield': float(row[16]) if row[16] is not None else None,
-                    'total_return': float(row[17]) if row[17] is not None else None,
-                    'ave_ann_ret': float(row[18]) if row[18] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[19])
-                }
-            return None
+            return build_summary(cursor.fetchall())
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
-    def get_rrr_details(calculation_id, user_id):
-        conn = db_conn()
-        cursor = conn.cursor()
+    def iter_user_portfolio(user_id, fetch_size):
+        conn = pool.getconn()
         try:
-            cursor.execute(
-                """SELECT calculation_id, title, calculation_date, open_price, 
-                take_profit, stop_loss, balance, risk_per_trade, position_size, 
-                position_cost, rrr, profit_per_share, risk_per_share, total_profit, 
-                total_risk, balance_after_profit, balance_after_loss, created_at
-                FROM saved_rrr 
-                WHERE calculation_id = %s AND user_id = %s""",
-                (calculation_id, user_id)
-            )
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'calculation_id': row[0],
-                    'title': row[1],
-                    'calculation_date': SavedCalculations._serialize_date(row[2]),
-                    'open_price': float(row[3]) if row[3] is not None else None,
-                    'take_profit': float(row[4]) if row[4] is not None else None,
-                    'stop_loss': float(row[5]) if row[5] is not None else None,
-                    'balance': float(row[6]) if row[6] is not None else None,
-                    'risk_per_trade': float(row[7]) if row[7] is not None else None,
-                    'position_size': float(row[8]) if row[8] is not None else None,
-                    'position_cost': float(row[9]) if row[9] is not None else None,
-                    'rrr': float(row[10]) if row[10] is not None else None,
-                    'profit_per_share': float(row[11]) if row[11] is not None else None,
-                    'risk_per_share': float(row[12]) if row[12] is not None else None,
-                    'total_profit': float(row[13]) if row[13] is not None else None,
-                    'total_risk': float(row[14]) if row[14] is not None else None,
-                    'balance_after_profit': float(row[15]) if row[15] is not None else None,
-                    'balance_after_loss': float(row[16]) if row[16] is not None else None,
-                    'created_at': SavedCalculations._serialize_date(row[17])
-                }
-            return None
+            for key, spec in (('profit_loss', PROFIT_LOSS), ('dividend', DIVIDEND), ('rrr', RRR)):
+                cursor = conn.cursor(name=f"export_{key}")
+                cursor.itersize = fetch_size
+                try:
+                    cursor.execute(
+                        f"""SELECT {spec.select_list}
+                        FROM {spec.table}
+                        WHERE user_id = %s
+                        ORDER BY created_at, calculation_id""",
+                        (user_id,)
+                    )
+                    while True:
+                        rows = cursor.fetchmany(fetch_size)
+                        if not rows:
+                            break
+                        yield key, spec, rows
+                finally:
+                    cursor.close()
         finally:
-            cursor.close()
-            conn.close()
+            pool.putconn(conn)
+
+    @staticmethod
+    def get_profit_loss_details(calculation_id, user_id):
+        return SavedCalculations._details(PROFIT_LOSS, calculation_id, user_id)
+
+    @staticmethod
+    def get_dividend_details(calculation_id, user_id):
+        return SavedCalculations._details(DIVIDEND, calculation_id, user_id)
+
+    @staticmethod
+    def get_rrr_details(calculation_id, user_id):
+        return SavedCalculations._details(RRR, calculation_id, user_id)
 
     @staticmethod
     def delete_profit_loss_calculation(calculation_id, user_id):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "DELETE FROM saved_profit_loss WHERE calculation_id = %s AND user_id = %s",
                 (calculation_id, user_id)
             )
@@ -390,14 +352,15 @@ class SavedCalculations:
             return cursor.rowcount > 0
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
     def delete_dividend_calculation(calculation_id, user_id):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "DELETE FROM saved_dividend WHERE calculation_id = %s AND user_id = %s",
                 (calculation_id, user_id)
             )
@@ -405,14 +368,15 @@ class SavedCalculations:
             return cursor.rowcount > 0
         finally:
             cursor.close()
-            conn.close()
+            pool.putconn(conn)
 
     @staticmethod
     def delete_rrr_calculation(calculation_id, user_id):
-        conn = db_conn()
+        conn = pool.getconn()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            pool.statements.execute(
+                cursor,
                 "DELETE FROM saved_rrr WHERE calculation_id = %s AND user_id = %s",
                 (calculation_id, user_id)
             )
@@ -420,4 +384,4 @@ class SavedCalculations:
             return cursor.rowcount > 0
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            pool.putconn(conn)
\ No newline at end of file
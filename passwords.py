@@ -0,0 +1,72 @@
+import os
+import time
+import asyncio
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', min(4, os.cpu_count() or 1)))
+BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', BCRYPT_WORKERS * 8))
+
+class AuthBusyError(Exception):
+    pass
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+def _verify(password, hashed):
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+class PasswordHasher:
+    def __init__(self, rounds, workers, max_pending):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.time_total = 0.0
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise AuthBusyError("Too many sign-in requests, please try again shortly")
+
+        self._pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self._pending)
+        started = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self.time_total += time.monotonic() - started
+
+    async def hash(self, password):
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password, hashed):
+        return await self._run(_verify, password, hashed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def metrics(self):
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "pending": self._pending,
+            "queued": max(0, self._pending - self.workers),
+            "max_pending": self.max_pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "time_avg": self.time_total / self.completed if self.completed else 0.0
+        }
+
+password_hasher = PasswordHasher(BCRYPT_ROUNDS, BCRYPT_WORKERS, BCRYPT_MAX_PENDING)
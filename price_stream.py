@@ -0,0 +1,126 @@
+import os
+import json
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOPICS = ("crypto", "fx", "stocks")
+MAX_STREAM_CONNECTIONS = int(os.getenv('MAX_STREAM_CONNECTIONS', 500))
+STREAM_KEEPALIVE = float(os.getenv('STREAM_KEEPALIVE', 15))
+STREAM_RETRY_MS = int(os.getenv('STREAM_RETRY_MS', 5000))
+
+def format_event(topic, payload):
+    return f"event: {topic}\ndata: {json.dumps(payload)}\n\n"
+
+class Subscriber:
+    def __init__(self, topics):
+        self.topics = set(topics)
+        self._pending = {}
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, topic, payload):
+        if topic in self._pending:
+            self.dropped += 1
+        self._pending[topic] = payload
+        self._ready.set()
+
+    async def next_batch(self, timeout):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        batch, self._pending = self._pending, {}
+        return batch
+
+class PriceBroadcaster:
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self._subscribers = set()
+        self._sources = {}
+        self._tasks = []
+        self._latest = {}
+        self.published = 0
+        self.rejected = 0
+
+    def add_source(self, topic, fetch, interval):
+        self._sources[topic] = (fetch, interval)
+
+    def subscribe(self, topics):
+        if len(self._subscribers) >= self.max_connections:
+            self.rejected += 1
+            return None
+        subscriber = Subscriber(topics)
+        for topic in subscriber.topics:
+            if topic in self._latest:
+                subscriber.offer(topic, self._latest[topic])
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, topic, payload):
+        self._latest[topic] = payload
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if topic in subscriber.topics:
+                subscriber.offer(topic, payload)
+
+    def _has_subscribers(self, topic):
+        return any(topic in subscriber.topics for subscriber in self._subscribers)
+
+    async def _run_source(self, topic, fetch, interval):
+        while True:
+            if self._has_subscribers(topic):
+                try:
+                    payload = await fetch()
+                    if payload is not None and payload != self._latest.get(topic):
+                        self.publish(topic, payload)
+                except Exception as e:
+                    print(f"Error refreshing {topic} stream: {e}")
+            await asyncio.sleep(interval)
+
+    async def events(self, subscriber, is_disconnected):
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while True:
+                batch = await subscriber.next_batch(STREAM_KEEPALIVE)
+                if await is_disconnected():
+                    break
+                if batch is None:
+                    yield ": keepalive\n\n"
+                    continue
+                for topic, payload in batch.items():
+                    yield format_event(topic, payload)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def start(self):
+        if self._tasks:
+            return
+        for topic, (fetch, interval) in self._sources.items():
+            self._tasks.append(asyncio.create_task(self._run_source(topic, fetch, interval)))
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def metrics(self):
+        return {
+            "connections": len(self._subscribers),
+            "max_connections": self.max_connections,
+            "rejected": self.rejected,
+            "published": self.published,
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers)
+        }
+
+price_broadcaster = PriceBroadcaster(MAX_STREAM_CONNECTIONS)
@@ -0,0 +1,331 @@
+import os
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUOTA_BACKEND = os.getenv('QUOTA_BACKEND', 'sqlite')
+QUOTA_DB_PATH = os.getenv('QUOTA_DB_PATH', os.path.join('data', 'quota.db'))
+QUOTA_SOFT_LIMIT = float(os.getenv('QUOTA_SOFT_LIMIT', 0.5))
+QUOTA_MAX_BACKOFF = float(os.getenv('QUOTA_MAX_BACKOFF', 16))
+QUOTA_RATE_LIMITED_SECONDS = float(os.getenv('QUOTA_RATE_LIMITED_SECONDS', 60))
+QUOTA_REFRESH_INTERVAL = float(os.getenv('QUOTA_REFRESH_INTERVAL', 5))
+
+class QuotaExceededError(Exception):
+    pass
+
+def _parse_quota(value):
+    calls, window = value.split('/')
+    return int(calls), float(window)
+
+def _parse_keys(*names):
+    keys = []
+    for name in names:
+        for key in os.getenv(name, '').split(','):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+class MemoryQuotaStore:
+    def __init__(self):
+        self._calls = {}
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def _used(self, budget, key_id, window, now):
+        calls = self._calls.setdefault((budget, key_id), deque())
+        while calls and now - calls[0] >= window:
+            calls.popleft()
+        if now < self._blocked.get((budget, key_id), 0.0):
+            return None
+        return len(calls)
+
+    def usage(self, budget, key_ids, window, now):
+        with self._lock:
+            return {key_id: self._used(budget, key_id, window, now) for key_id in key_ids}
+
+    def acquire(self, budget, key_ids, limit, window, now):
+        with self._lock:
+            usage = {key_id: self._used(budget, key_id, window, now) for key_id in key_ids}
+            key_id = _pick(usage, limit)
+            if key_id is not None:
+                self._calls[(budget, key_id)].append(now)
+                usage[key_id] += 1
+            return key_id, usage
+
+    def refund(self, budget, key_id):
+        with self._lock:
+            calls = self._calls.get((budget, key_id))
+            if calls:
+                calls.pop()
+
+    def block(self, budget, key_id, until):
+        with self._lock:
+            self._blocked[(budget, key_id)] = until
+
+    def close(self):
+        pass
+
+class SQLiteQuotaStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_calls ("
+                "budget TEXT NOT NULL, key_id TEXT NOT NULL, called_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS quota_calls_budget_called_at ON quota_calls (budget, called_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_blocks ("
+                "budget TEXT NOT NULL, key_id TEXT NOT NULL, blocked_until REAL NOT NULL, "
+                "PRIMARY KEY (budget, key_id))"
+            )
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _usage(self, conn, budget, key_ids, window, now):
+        usage = dict.fromkeys(key_ids, 0)
+        for key_id, count in conn.execute(
+            "SELECT key_id, COUNT(*) FROM quota_calls WHERE budget = ? AND called_at > ? GROUP BY key_id",
+            (budget, now - window)
+        ):
+            if key_id in usage:
+                usage[key_id] = count
+        for (key_id,) in conn.execute(
+            "SELECT key_id FROM quota_blocks WHERE budget = ? AND blocked_until > ?", (budget, now)
+        ):
+            if key_id in usage:
+                usage[key_id] = None
+        return usage
+
+    def usage(self, budget, key_ids, window, now):
+        return self._usage(self._conn(), budget, key_ids, window, now)
+
+    def acquire(self, budget, key_ids, limit, window, now):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM quota_calls WHERE budget = ? AND called_at <= ?", (budget, now - window))
+            usage = self._usage(conn, budget, key_ids, window, now)
+            key_id = _pick(usage, limit)
+            if key_id is not None:
+                conn.execute(
+                    "INSERT INTO quota_calls (budget, key_id, called_at) VALUES (?, ?, ?)",
+                    (budget, key_id, now)
+                )
+                usage[key_id] += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return key_id, usage
+
+    def refund(self, budget, key_id):
+        self._conn().execute(
+            "DELETE FROM quota_calls WHERE rowid = "
+            "(SELECT MAX(rowid) FROM quota_calls WHERE budget = ? AND key_id = ?)",
+            (budget, key_id)
+        )
+
+    def block(self, budget, key_id, until):
+        self._conn().execute(
+            "INSERT INTO quota_blocks (budget, key_id, blocked_until) VALUES (?, ?, ?) "
+            "ON CONFLICT (budget, key_id) DO UPDATE SET blocked_until = excluded.blocked_until",
+            (budget, key_id, until)
+        )
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+_quota_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quota")
+
+async def _run_store(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_quota_executor, partial(func, *args))
+
+def _pick(usage, limit):
+    best = None
+    best_remaining = 0
+    for key_id, used in usage.items():
+        remaining = 0 if used is None else limit - used
+        if remaining > best_remaining:
+            best, best_remaining = key_id, remaining
+    return best
+
+class KeyBudget:
+    def __init__(self, key, limit, window):
+        self.key = key
+        self.limit = limit
+        self.window = window
+        self.key_id = "default" if key is None else hashlib.sha256(key.encode()).hexdigest()[:16]
+        self.total_calls = 0
+
+    def label(self):
+        if self.key is None:
+            return "default"
+        return f"...{self.key[-4:]}"
+
+class QuotaBudget:
+    def __init__(self, name, limit, window, keys=None, key_param=None, store=None):
+        self.name = name
+        self.key_param = key_param
+        self.window = window
+        self.keys = [KeyBudget(key, limit, window) for key in (keys or [None])]
+        self._by_id = {key.key_id: key for key in self.keys}
+        self.store = store or MemoryQuotaStore()
+        self._remaining = {key.key_id: key.limit for key in self.keys}
+        self._refreshed_at = 0.0
+        self._refreshing = False
+        self.rejected = 0
+        self.store_errors = 0
+
+    @property
+    def limit(self):
+        return sum(key.limit for key in self.keys)
+
+    def _store_error(self, action, e):
+        self.store_errors += 1
+        print(f"Error {action} {self.name} quota: {e}")
+
+    def _update(self, usage):
+        self._remaining = {
+            key_id: 0 if used is None else max(0, self._by_id[key_id].limit - used)
+            for key_id, used in usage.items()
+        }
+        self._refreshed_at = time.monotonic()
+
+    def _read_usage(self):
+        try:
+            return self.store.usage(self.name, list(self._by_id), self.window, time.time())
+        except sqlite3.Error as e:
+            self._store_error("reading", e)
+            return None
+
+    def _refreshed(self, future):
+        self._refreshing = False
+        usage = future.result()
+        if usage is not None:
+            self._update(usage)
+
+    def _maybe_refresh(self):
+        if self._refreshing or time.monotonic() - self._refreshed_at < QUOTA_REFRESH_INTERVAL:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refreshing = True
+        loop.run_in_executor(_quota_executor, self._read_usage).add_done_callback(self._refreshed)
+
+    def remaining(self):
+        self._maybe_refresh()
+        return sum(self._remaining.values())
+
+    def _acquire(self):
+        try:
+            return self.store.acquire(self.name, list(self._by_id), self.keys[0].limit, self.window, time.time())
+        except sqlite3.Error as e:
+            self._store_error("updating", e)
+            return self.keys[0].key_id, None
+
+    async def acquire(self):
+        key_id, usage = await _run_store(self._acquire)
+        if usage is not None:
+            self._update(usage)
+        if key_id is None:
+            self.rejected += 1
+            raise QuotaExceededError(f"{self.name} API quota exhausted")
+        key_budget = self._by_id[key_id]
+        key_budget.total_calls += 1
+        return key_budget
+
+    def _write(self, func, *args):
+        try:
+            func(self.name, *args)
+        except sqlite3.Error as e:
+            self._store_error("updating", e)
+
+    async def refund(self, key_budget):
+        key_budget.total_calls -= 1
+        key_id = key_budget.key_id
+        self._remaining[key_id] = min(key_budget.limit, self._remaining[key_id] + 1)
+        await _run_store(self._write, self.store.refund, key_id)
+
+    async def rate_limited(self, key_budget, retry_after=None):
+        until = time.time() + (retry_after or QUOTA_RATE_LIMITED_SECONDS)
+        self._remaining[key_budget.key_id] = 0
+        await _run_store(self._write, self.store.block, key_budget.key_id, until)
+
+    def backoff_factor(self):
+        fraction = self.remaining() / self.limit
+        if fraction >= QUOTA_SOFT_LIMIT:
+            return 1.0
+        return min(QUOTA_MAX_BACKOFF, QUOTA_SOFT_LIMIT / max(fraction, QUOTA_SOFT_LIMIT / QUOTA_MAX_BACKOFF))
+
+    def scaled(self, base):
+        return base * self.backoff_factor()
+
+    def metrics(self):
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining(),
+            "backoff_factor": self.backoff_factor(),
+            "rejected": self.rejected,
+            "store_errors": self.store_errors,
+            "keys": {
+                key.label(): {"remaining": self._remaining[key.key_id], "calls": key.total_calls}
+                for key in self.keys
+            }
+        }
+
+def build_quota_store():
+    if QUOTA_BACKEND == "memory":
+        return MemoryQuotaStore()
+    if QUOTA_BACKEND == "sqlite":
+        return SQLiteQuotaStore(QUOTA_DB_PATH)
+    raise ValueError(f"Unknown QUOTA_BACKEND: {QUOTA_BACKEND}")
+
+quota_store = build_quota_store()
+
+def build_budgets(binance, oxr, finnhub):
+    return {
+        binance: QuotaBudget(binance, *_parse_quota(os.getenv('BINANCE_QUOTA', '1200/60')), store=quota_store),
+        oxr: QuotaBudget(
+            oxr, *_parse_quota(os.getenv('OXR_QUOTA', '1000/2592000')),
+            keys=_parse_keys('API_ID_ER', 'API_ID_ER_KEYS'), key_param='app_id', store=quota_store
+        ),
+        finnhub: QuotaBudget(
+            finnhub, *_parse_quota(os.getenv('FINNHUB_QUOTA', '60/60')),
+            keys=_parse_keys('FINNHUB_API_KEY', 'FINNHUB_API_KEYS'), key_param='token', store=quota_store
+        ),
+    }
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import numpy as np
+from dotenv import load_dotenv
+from upstream import OXR, upstream_get, budgets
+from timeseries import price_store
+
+load_dotenv()
+
+RATES_TTL = float(os.getenv('RATES_TTL', 300))
+RATES_STALE_TTL = float(os.getenv('RATES_STALE_TTL', 3600))
+HISTORY_CURRENCIES = [c.strip().upper() for c in os.getenv('HISTORY_CURRENCIES', 'EUR,RUB,CNY,CHF,GBP,JPY').split(',') if c.strip()]
+
+async def fetch_latest_rates():
+    response = await upstream_get(OXR, "/api/latest.json")
+    data = response.json()
+
+    timestamp = int(data.get('timestamp', time.time())) * 1000
+    for currency in HISTORY_CURRENCIES:
+        if currency in data['rates']:
+            price_store.append(f"USD{currency}", "oxr", timestamp, data['rates'][currency])
+    return data
+
+class CrossRateMatrix:
+    def __init__(self, rates):
+        self.currencies = sorted(rates)
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+        per_usd = np.array([float(rates[currency]) for currency in self.currencies])
+        self.matrix = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+
+    def __contains__(self, currency):
+        return currency in self.index
+
+    def rate(self, from_currency, to_currency):
+        return float(self.matrix[self.index[from_currency], self.index[to_currency]])
+
+    def convert(self, amount, from_currency, to_currency):
+        return amount * self.rate(from_currency, to_currency)
+
+    def convert_many(self, amounts, from_currencies, to_currencies):
+        rows = np.fromiter((self.index[c] for c in from_currencies), dtype=np.intp, count=len(from_currencies))
+        cols = np.fromiter((self.index[c] for c in to_currencies), dtype=np.intp, count=len(to_currencies))
+        return np.asarray(amounts, dtype=float) * self.matrix[rows, cols]
+
+class RatesCache:
+    def __init__(self, fetch, ttl, stale_ttl, budget=None):
+        self._fetch = fetch
+        self.base_ttl = ttl
+        self.budget = budget
+        self.stale_ttl = stale_ttl
+        self._data = None
+        self.matrix = None
+        self._fetched_at = 0.0
+        self._inflight = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.stale_served = 0
+
+    @property
+    def ttl(self):
+        if self.budget is None:
+            return self.base_ttl
+        return self.budget.scaled(self.base_ttl)
+
+    def age(self):
+        if self._data is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    async def get(self):
+        age = self.age()
+        if age is not None and age < self.ttl:
+            self.hits += 1
+            return self._data
+
+        if age is not None and age < self.ttl + self.stale_ttl:
+            self.stale_hits += 1
+            self._start_refresh()
+            return self._data
+
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._start_refresh())
+        except Exception:
+            if self._data is None:
+                raise
+            self.stale_served += 1
+            return self._data
+
+    def is_stale(self):
+        age = self.age()
+        return age is None or age >= self.ttl
+
+    async def get_rates(self):
+        data = await self.get()
+        return data['rates']
+
+    async def get_matrix(self):
+        await self.get()
+        return self.matrix
+
+    def _start_refresh(self):
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._load())
+            self._inflight.add_done_callback(self._on_refresh_done)
+        return self._inflight
+
+    async def _load(self):
+        data = await self._fetch()
+        self.matrix = CrossRateMatrix(data['rates'])
+        self._data = data
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        return data
+
+    def _on_refresh_done(self, task):
+        self._inflight = None
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+            print(f"Error refreshing exchange rates: {task.exception()}")
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "stale_served": self.stale_served,
+            "age": self.age(),
+            "ttl": self.ttl
+        }
+
+rates_cache = RatesCache(fetch_latest_rates, RATES_TTL, RATES_STALE_TTL, budgets[OXR])
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+def serialize_date(date_obj):
+    if date_obj is None:
+        return None
+    if isinstance(date_obj, datetime):
+        return date_obj.isoformat()
+    if isinstance(date_obj, str):
+        return date_obj
+    return str(date_obj)
+
+class TableSpec:
+    def __init__(self, table, columns, dates=("calculation_date", "created_at")):
+        self.table = table
+        self.columns = list(columns)
+        self.dates = set(dates)
+        self.select_list = ", ".join(self.columns)
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self.convert = self._compile()
+
+    def index(self, name):
+        return self._positions[name]
+
+    def _compile(self):
+        fields = []
+        for i, name in enumerate(self.columns):
+            value = f"_date(row[{i}])" if name in self.dates else f"row[{i}]"
+            fields.append(f"{name!r}: {value}")
+        source = "def convert(row):\n    return {" + ", ".join(fields) + "}\n"
+        namespace = {"_date": serialize_date}
+        exec(compile(source, f"<{self.table} row converter>", "exec"), namespace)
+        return namespace["convert"]
+
+    def convert_rows(self, rows):
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+    def columnar(self, rows):
+        if not rows:
+            return {name: [] for name in self.columns}
+        values = list(zip(*rows))
+        return {
+            name: [serialize_date(value) for value in values[i]] if name in self.dates else list(values[i])
+            for i, name in enumerate(self.columns)
+        }
+
+PROFIT_LOSS = TableSpec("saved_profit_loss", [
+    "calculation_id", "title", "calculation_date", "asset_type",
+    "open_price", "close_price", "amount", "volume", "leverage", "position_size",
+    "profit_loss", "profit_loss_yield", "margin", "created_at"
+])
+
+DIVIDEND = TableSpec("saved_dividend", [
+    "calculation_id", "title", "calculation_date", "price_of_1_share",
+    "from_currency", "number_of_shares", "div_per_1_share", "pay_period", "own_period",
+    "tax_rate", "div_growth", "total_div", "div_yield", "total_div_yield", "invest",
+    "ann_div_yield", "total_period_div_yield", "total_return", "ave_ann_ret", "created_at"
+])
+
+RRR = TableSpec("saved_rrr", [
+    "calculation_id", "title", "calculation_date", "open_price",
+    "take_profit", "stop_loss", "balance", "risk_per_trade", "position_size",
+    "position_cost", "rrr", "profit_per_share", "risk_per_share", "total_profit",
+    "total_risk", "balance_after_profit", "balance_after_loss", "created_at"
+])
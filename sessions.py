@@ -0,0 +1,203 @@
+import os
+import time
+import secrets
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from models import User
+
+load_dotenv()
+
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite')
+SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', os.path.join('data', 'sessions.db'))
+SESSION_TTL = float(os.getenv('SESSION_TTL', 86400))
+SESSION_TOUCH_INTERVAL = float(os.getenv('SESSION_TOUCH_INTERVAL', 60))
+SESSION_PURGE_INTERVAL = float(os.getenv('SESSION_PURGE_INTERVAL', 300))
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+class MemorySessionStore:
+    def __init__(self, ttl, touch_interval, purge_interval):
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._purged_at = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def create(self, user):
+        session_id = new_session_id()
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = ((user.id, user.username, user.email), now + self.ttl, now)
+        self._maybe_purge(now)
+        return session_id
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            fields, expires_at, touched_at = entry
+            if expires_at <= now:
+                del self._sessions[session_id]
+                self.expired += 1
+                self.misses += 1
+                return None
+            if now - touched_at >= self.touch_interval:
+                self._sessions[session_id] = (fields, now + self.ttl, now)
+            self.hits += 1
+        return User(*fields)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _maybe_purge(self, now):
+        if now - self._purged_at >= self.purge_interval:
+            self.purge(now)
+
+    def purge(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._sessions.items() if expires_at <= now]
+            for key in expired:
+                del self._sessions[key]
+            self.expired += len(expired)
+            self._purged_at = now
+
+    def close(self):
+        pass
+
+    def metrics(self):
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "backend": "memory",
+            "active": active,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "ttl": self.ttl
+        }
+
+class SQLiteSessionStore:
+    def __init__(self, path, ttl, touch_interval, purge_interval):
+        self.path = path
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._purged_at = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, username TEXT NOT NULL, "
+                "email TEXT, expires_at REAL NOT NULL, touched_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def create(self, user):
+        session_id = new_session_id()
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO sessions (session_id, user_id, username, email, expires_at, touched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (session_id, user.id, user.username, user.email, now + self.ttl, now)
+        )
+        if now - self._purged_at >= self.purge_interval:
+            self.purge(now)
+        return session_id
+
+    def get(self, session_id):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT user_id, username, email, expires_at, touched_at FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        user_id, username, email, expires_at, touched_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self.expired += 1
+            self.misses += 1
+            return None
+        if now - touched_at >= self.touch_interval:
+            conn.execute(
+                "UPDATE sessions SET expires_at = ?, touched_at = ? WHERE session_id = ?",
+                (now + self.ttl, now, session_id)
+            )
+        self.hits += 1
+        return User(user_id, username, email)
+
+    def delete(self, session_id):
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge(self, now=None):
+        now = time.time() if now is None else now
+        cursor = self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        self.expired += cursor.rowcount
+        self._purged_at = now
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    def metrics(self):
+        try:
+            active = self._conn().execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+        except Exception as e:
+            print(f"Error reading session metrics: {e}")
+            active = None
+        return {
+            "backend": "sqlite",
+            "active": active,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "ttl": self.ttl
+        }
+
+def build_session_store():
+    if SESSION_BACKEND == "memory":
+        return MemorySessionStore(SESSION_TTL, SESSION_TOUCH_INTERVAL, SESSION_PURGE_INTERVAL)
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(SESSION_DB_PATH, SESSION_TTL, SESSION_TOUCH_INTERVAL, SESSION_PURGE_INTERVAL)
+    raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND}")
+
+session_store = build_session_store()
@@ -1,32 +1,57 @@
+const PRICE_POLL_INTERVAL = 5000;
+let pricePollTimer = null;
+
+function renderCryptoPrices(btcPrice, ethPrice) {
+    document.querySelector('.bitcoin-price').textContent = `$${parseFloat(btcPrice).toFixed(2)}`;
+    document.querySelector('.ethereum-price').textContent = `$${parseFloat(ethPrice).toFixed(2)}`;
+}
+
 async function updateCryptoPrices() {
     try {
+        const response = await fetch('/api/crypto');
+        if (!response.ok) throw new Error('Error fetching crypto prices');
+        const data = await response.json();
+        renderCryptoPrices(data.btc_price, data.eth_price);
+    } catch (error) {
+        console.error('Error fetching crypto prices:', error);
+    }
+}
 
-        const [btcResponse, ethResponse] = await Promise.all([
-            fetch('https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT'),
-            fetch('https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT')
-        ]);
+function startPricePolling() {
+    if (pricePollTimer) return;
+    updateCryptoPrices();
+    pricePollTimer = setInterval(updateCryptoPrices, PRICE_POLL_INTERVAL);
+}
 
-        const btcData = await btcResponse.json();
-        const ethData = await ethResponse.json();
+function stopPricePolling() {
+    if (!pricePollTimer) return;
+    clearInterval(pricePollTimer);
+    pricePollTimer = null;
+}
 
-        document.querySelector('.bitcoin-price').textContent = `$${parseFloat(btcData.price).toFixed(2)}`;
-        document.querySelector('.ethereum-price').textContent = `$${parseFloat(ethData.price).toFixed(2)}`;
-    } catch (error) {
-        console.error('Error fetching crypto prices:', error);
+function connectPriceStream() {
+    if (!window.EventSource) {
+        startPricePolling();
+        return;
+    }
+
+    const source = new EventSource('/stream/prices?topics=crypto');
 
-        try {
-            const response = await fetch('/api/crypto');
-            const data = await response.json();
-            document.querySelector('.bitcoin-price').textContent = `$${data.btc_price.toFixed(2)}`;
-            document.querySelector('.ethereum-price').textContent = `$${data.eth_price.toFixed(2)}`;
-        } catch (fallbackError) {
-            console.error('Fallback also failed:', fallbackError);
+    source.addEventListener('crypto', event => {
+        const data = JSON.parse(event.data);
+        if (data.prices.BTCUSDT !== undefined && data.prices.ETHUSDT !== undefined) {
+            stopPricePolling();
+            renderCryptoPrices(data.prices.BTCUSDT, data.prices.ETHUSDT);
         }
-    }
+    });
+
+    source.onerror = () => {
+        startPricePolling();
+    };
 }
 
 updateCryptoPrices();
-setInterval(updateCryptoPrices, 5000);
+connectPriceStream();
 
 let currentDays = '1';
 let currentCrypto = 'bitcoin';
@@ -52,41 +77,41 @@ function getLimitForDays(days) {
     }
 }
 
-async function fetchBinanceData(symbol, interval, limit) {
+const chartDataCache = {};
+
+async function fetchChartData(symbol, interval, limit) {
+    const key = `${symbol}:${interval}:${limit}`;
+    const cached = chartDataCache[key];
+
     try {
-        const response = await fetch(
-            `https://api.binance.com/api/v3/klines?symbol=${symbol}&interval=${interval}&limit=${limit}`
-        );
+        let url = `/api/klines?symbol=${symbol}&interval=${interval}&limit=${limit}`;
+        if (cached && cached.prices.length > 0) {
+            url += `&since=${cached.prices[cached.prices.length - 1][0]}`;
+        }
 
-        if (!response.ok) throw new Error('Error fetching data from Binance');
+        const response = await fetch(url);
+        if (!response.ok) throw new Error('Error fetching chart data');
         const data = await response.json();
 
-        const prices = data.map(candle => [
-            candle[0],
-            parseFloat(candle[4])
-        ]);
+        let prices = data.prices;
+        if (cached && cached.prices.length > 0) {
+            const firstNewTime = prices.length > 0 ? prices[0][0] : Infinity;
+            prices = cached.prices
+                .filter(point => point[0] < firstNewTime)
+                .concat(prices)
+                .slice(-limit);
+        }
 
+        chartDataCache[key] = { prices };
         return { prices };
     } catch (error) {
-        console.error(`Error fetching ${symbol} data from Binance:`, error);
+        console.error(`Error fetching ${symbol} chart data:`, error);
 
-        return generateFallbackData(parseInt(days));
-    }
-}
-
-function generateFallbackData(days) {
-    const now = Date.now();
-    const prices = [];
-    const basePrice = currentCrypto === 'bitcoin' ? 50000 : 3000;
-    const hours = days * 24;
-
-    for (let i = 0; i <= hours; i++) {
-        const time = now - ((hours - i) * 3600000);
-        const price = basePrice + Math.random() * basePrice * 0.1;
-        prices.push([time, price]);
+        if (cached) {
+            return cached;
+        }
+        throw error;
     }
-
-    return { prices };
 }
 
 function updateLastUpdateTime() {
@@ -121,7 +146,7 @@ async function loadChartData() {
         }
         loadingIndicator.style.display = 'block';
 
-        const data = await fetchBinanceData(symbol, interval, limit);
+        const data = await fetchChartData(symbol, interval, limit);
 
         if (loadingIndicator) {
             loadingIndicator.style.display = 'none';
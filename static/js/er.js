@@ -32,22 +32,59 @@ const mql5WidgetConfigs = {
 let currentCurrency = 'USDRUB';
 let currentWidget = null;
 
+const CURRENCY_POLL_INTERVAL = 30000;
+let currencyPollTimer = null;
+
+function renderCurrencyPrices(data) {
+    document.querySelector('.usd-price').textContent = `${data.usdprice.toFixed(2)} RUB`;
+    document.querySelector('.eur-price').textContent = `${data.eurprice.toFixed(2)} RUB`;
+    document.querySelector('.cny-price').textContent = `${data.cnyprice.toFixed(2)} RUB`;
+    document.querySelector('.chf-price').textContent = `${data.chfprice.toFixed(2)} RUB`;
+
+    updateLastUpdateTime();
+}
+
 async function updateCurrencyPrices() {
     try {
         const response = await fetch('/api/currency');
         const data = await response.json();
 
-        document.querySelector('.usd-price').textContent = `${data.usdprice.toFixed(2)} RUB`;
-        document.querySelector('.eur-price').textContent = `${data.eurprice.toFixed(2)} RUB`;
-        document.querySelector('.cny-price').textContent = `${data.cnyprice.toFixed(2)} RUB`;
-        document.querySelector('.chf-price').textContent = `${data.chfprice.toFixed(2)} RUB`;
-
-        updateLastUpdateTime();
+        renderCurrencyPrices(data);
     } catch (error) {
         console.error('Error fetching currency prices:', error);
     }
 }
 
+function startCurrencyPolling() {
+    if (currencyPollTimer) return;
+    updateCurrencyPrices();
+    currencyPollTimer = setInterval(updateCurrencyPrices, CURRENCY_POLL_INTERVAL);
+}
+
+function stopCurrencyPolling() {
+    if (!currencyPollTimer) return;
+    clearInterval(currencyPollTimer);
+    currencyPollTimer = null;
+}
+
+function connectCurrencyStream() {
+    if (!window.EventSource) {
+        startCurrencyPolling();
+        return;
+    }
+
+    const source = new EventSource('/stream/prices?topics=fx');
+
+    source.addEventListener('fx', event => {
+        stopCurrencyPolling();
+        renderCurrencyPrices(JSON.parse(event.data));
+    });
+
+    source.onerror = () => {
+        startCurrencyPolling();
+    };
+}
+
 function updateLastUpdateTime() {
     const now = new Date();
     const formattedTime = now.toLocaleTimeString('en-US', {
@@ -194,5 +231,5 @@ document.addEventListener('DOMContentLoaded', function() {
 
     updateCurrencyPrices();
 
-    setInterval(updateCurrencyPrices, 30000);
+    connectCurrencyStream();
 });
\ No newline at end of file
@@ -3,37 +3,73 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentDeleteId = null;
     let currentDeleteType = null;
 
-    function loadSavedCalculations() {
+    function fetchWithETag(url) {
+        const cacheKey = `etag-cache:${url}`;
+        let cached = null;
+        try {
+            cached = JSON.parse(sessionStorage.getItem(cacheKey));
+        } catch (e) {
+            cached = null;
+        }
 
-        fetch('/get_saved_pl')
-            .then(response => response.json())
-            .then(data => {
-                if (data.success && data.calculations && data.calculations.length > 0) {
-                    displaySavedCalculations(data.calculations, 'transaction-history-list', 'saved-transaction-history', 'pl');
+        const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+        return fetch(url, { headers: headers, cache: 'no-store' })
+            .then(response => {
+                if (response.status === 304 && cached) {
+                    return cached.data;
                 }
-            })
-            .catch(error => console.error('Error loading saved PL:', error));
+                return response.json().then(data => {
+                    const etag = response.headers.get('ETag');
+                    if (response.ok && etag) {
+                        try {
+                            sessionStorage.setItem(cacheKey, JSON.stringify({ etag: etag, data: data }));
+                        } catch (e) {
+                            console.warn('Could not cache response:', e);
+                        }
+                    }
+                    return data;
+                });
+            });
+    }
 
-        fetch('/get_saved_div')
-            .then(response => response.json())
+    function loadSavedCalculations() {
+
+        fetchWithETag('/api/portfolio')
             .then(data => {
-                if (data.success && data.calculations && data.calculations.length > 0) {
-                    displaySavedCalculations(data.calculations, 'dividend-payments-list', 'saved-dividend-payments', 'div');
+                if (!data.success) {
+                    return;
+                }
+                const cursors = data.next_cursors || {};
+                if (data.profit_loss && data.profit_loss.length > 0) {
+                    displaySavedCalculations(data.profit_loss, 'transaction-history-list', 'saved-transaction-history', 'pl', cursors.profit_loss);
+                }
+                if (data.dividend && data.dividend.length > 0) {
+                    displaySavedCalculations(data.dividend, 'dividend-payments-list', 'saved-dividend-payments', 'div', cursors.dividend);
+                }
+                if (data.rrr && data.rrr.length > 0) {
+                    displaySavedCalculations(data.rrr, 'trading-ideas-list', 'saved-trading-ideas', 'rrr', cursors.rrr);
                 }
             })
-            .catch(error => console.error('Error loading saved DIV:', error));
+            .catch(error => console.error('Error loading portfolio:', error));
+    }
 
-        fetch('/get_saved_rrr')
-            .then(response => response.json())
+    const listEndpoints = {
+        pl: '/get_saved_pl',
+        div: '/get_saved_div',
+        rrr: '/get_saved_rrr'
+    };
+
+    function loadMoreCalculations(listId, sectionId, type, after) {
+        fetchWithETag(`${listEndpoints[type]}?after=${encodeURIComponent(after)}`)
             .then(data => {
-                if (data.success && data.calculations && data.calculations.length > 0) {
-                    displaySavedCalculations(data.calculations, 'trading-ideas-list', 'saved-trading-ideas', 'rrr');
+                if (data.success) {
+                    displaySavedCalculations(data.calculations, listId, sectionId, type, data.next_cursor, true);
                 }
             })
-            .catch(error => console.error('Error loading saved RRR:', error));
+            .catch(error => console.error('Error loading more calculations:', error));
     }
 
-    function displaySavedCalculations(calculations, listId, sectionId, type) {
+    function displaySavedCalculations(calculations, listId, sectionId, type, nextCursor, append) {
         const listElement = document.getElementById(listId);
         const sectionElement = document.getElementById(sectionId);
 
@@ -42,9 +78,16 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        listElement.innerHTML = '';
+        if (append) {
+            const loadMoreButton = listElement.querySelector('.load-more-btn');
+            if (loadMoreButton) {
+                loadMoreButton.remove();
+            }
+        } else {
+            listElement.innerHTML = '';
+        }
 
-        if (calculations.length === 0) {
+        if (calculations.length === 0 && !append) {
             sectionElement.style.display = 'none';
             return;
         }
@@ -83,6 +126,14 @@ document.addEventListener('DOMContentLoaded', function() {
             listElement.appendChild(calculationItem);
         });
 
+        if (nextCursor) {
+            const loadMoreButton = document.createElement('button');
+            loadMoreButton.className = 'details-btn load-more-btn';
+            loadMoreButton.textContent = 'Load more';
+            loadMoreButton.addEventListener('click', () => loadMoreCalculations(listId, sectionId, type, nextCursor));
+            listElement.appendChild(loadMoreButton);
+        }
+
         sectionElement.style.display = 'block';
     }
 
@@ -103,8 +154,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
         }
 
-        fetch(`${endpoint}?id=${calculationId}`)
-            .then(response => response.json())
+        fetchWithETag(`${endpoint}?id=${calculationId}`)
             .then(data => {
                 if (data.success) {
                     displayCalculationDetails(data.calculation, type);
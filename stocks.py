@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+from dotenv import load_dotenv
+from upstream import FINNHUB, upstream_get, budgets
+from timeseries import price_store
+
+load_dotenv()
+
+FINNHUB_CALLS_PER_MINUTE = float(os.getenv('FINNHUB_CALLS_PER_MINUTE', 60))
+FINNHUB_BURST = int(os.getenv('FINNHUB_BURST', 10))
+FINNHUB_MAX_WAIT = float(os.getenv('FINNHUB_MAX_WAIT', 2))
+STOCK_QUOTE_TTL = float(os.getenv('STOCK_QUOTE_TTL', 15))
+STOCK_MAX_SYMBOLS = int(os.getenv('STOCK_MAX_SYMBOLS', 20))
+
+class RateLimitExceeded(Exception):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait):
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                if wait > max_wait:
+                    self.throttled += 1
+                    return False
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            return True
+
+finnhub_bucket = TokenBucket(FINNHUB_CALLS_PER_MINUTE / 60, FINNHUB_BURST)
+
+async def fetch_quote(symbol):
+    if not await finnhub_bucket.acquire(FINNHUB_MAX_WAIT):
+        raise RateLimitExceeded("Finnhub rate limit reached")
+
+    response = await upstream_get(FINNHUB, "/api/v1/quote", {"symbol": symbol})
+    data = response.json()
+    if not data.get("t"):
+        raise ValueError(f"No quote for {symbol}")
+    price_store.append(symbol, "quote", int(data["t"]) * 1000, data["c"])
+
+    return {
+        "price": round(data["c"], 2),
+        "change": data.get("d"),
+        "percent_change": data.get("dp"),
+        "timestamp": data.get("t")
+    }
+
+class QuoteCache:
+    def __init__(self, fetch, ttl, budget=None):
+        self._fetch = fetch
+        self.base_ttl = ttl
+        self.budget = budget
+        self._quotes = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    @property
+    def ttl(self):
+        if self.budget is None:
+            return self.base_ttl
+        return self.budget.scaled(self.base_ttl)
+
+    def _start_fetch(self, symbol):
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._load(symbol))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        return task
+
+    async def _load(self, symbol):
+        quote = await self._fetch(symbol)
+        self._quotes[symbol] = (quote, time.monotonic())
+        return quote
+
+    async def get(self, symbol):
+        entry = self._quotes.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return {**entry[0], "age": time.monotonic() - entry[1], "stale": False}
+
+        self.misses += 1
+        try:
+            await asyncio.shield(self._start_fetch(symbol))
+        except Exception as error:
+            if entry is None:
+                return {"error": str(error)}
+            self.stale_served += 1
+            return {**entry[0], "age": time.monotonic() - entry[1], "stale": True}
+
+        quote, fetched_at = self._quotes[symbol]
+        return {**quote, "age": time.monotonic() - fetched_at, "stale": False}
+
+    async def get_many(self, symbols):
+        results = await asyncio.gather(*[self.get(symbol) for symbol in symbols])
+        return dict(zip(symbols, results))
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_served": self.stale_served,
+            "throttled": finnhub_bucket.throttled,
+            "ttl": self.ttl
+        }
+
+stock_quotes = QuoteCache(fetch_quote, STOCK_QUOTE_TTL, budgets[FINNHUB])
@@ -0,0 +1,89 @@
+import sys
+import asyncio
+import argparse
+
+# Local stand-in for the Binance combined stream. Record real frames once, then
+# point BINANCE_WS_URL at ws://HOST:PORT to run the ticker stream against them.
+# Run that app with TIMESERIES_ENABLED=false (or a scratch TIMESERIES_DIR) so
+# replayed ticks never end up in the real price history.
+
+async def record(url, path, count):
+    import websockets
+
+    async with websockets.connect(url) as websocket:
+        with open(path, 'w') as frames:
+            for _ in range(count):
+                frames.write(await websocket.recv() + '\n')
+
+def load_frames(path):
+    with open(path) as frames:
+        return [line.rstrip('\n') for line in frames if line.strip()]
+
+async def serve(frames, host, port, interval, loop_frames):
+    import websockets
+
+    async def replay(websocket, *args):
+        try:
+            while True:
+                for frame in frames:
+                    await websocket.send(frame)
+                    await asyncio.sleep(interval)
+                if not loop_frames:
+                    break
+            await websocket.close()
+        except websockets.ConnectionClosed:
+            pass
+
+    async with websockets.serve(replay, host, port):
+        print(f"Replaying {len(frames)} frames on ws://{host}:{port}")
+        print("Run the app against it with TIMESERIES_ENABLED=false or a scratch TIMESERIES_DIR")
+        await asyncio.Future()
+
+def feed(frames, stream=None):
+    from binance_stream import TickerStream, ticker_stream
+    from market_data import PriceSnapshot
+    from timeseries import TIMESERIES_DIR, TimeSeriesStore
+
+    if stream is None:
+        stream = TickerStream(
+            ticker_stream.symbols,
+            snapshot=PriceSnapshot(),
+            store=TimeSeriesStore(TIMESERIES_DIR, enabled=False)
+        )
+    for frame in frames:
+        stream.handle_message(frame)
+    return stream
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--url")
+    record_parser.add_argument("--count", type=int, default=200)
+
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("path")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--interval", type=float, default=0.1)
+    serve_parser.add_argument("--loop", action="store_true")
+
+    feed_parser = commands.add_parser("feed")
+    feed_parser.add_argument("path")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        from binance_stream import ticker_stream
+        asyncio.run(record(args.url or ticker_stream.url, args.path, args.count))
+    elif args.command == "serve":
+        asyncio.run(serve(load_frames(args.path), args.host, args.port, args.interval, args.loop))
+    else:
+        stream = feed(load_frames(args.path))
+        print(stream.metrics())
+        for symbol, stats in sorted(stream.stats.items()):
+            print(symbol, stats["last_price"], stats["event_time"])
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
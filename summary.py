@@ -0,0 +1,167 @@
+from database import db_conn
+
+SUMMARY_SOURCES = {
+    "profit_loss": {
+        "table": "saved_profit_loss",
+        "asset_type": "COALESCE(asset_type, '')",
+        "win": "profit_loss > 0",
+        "total": "profit_loss",
+        "metric": "profit_loss_yield"
+    },
+    "dividend": {
+        "table": "saved_dividend",
+        "asset_type": "''",
+        "win": "FALSE",
+        "total": "total_div",
+        "metric": "div_yield"
+    },
+    "rrr": {
+        "table": "saved_rrr",
+        "asset_type": "''",
+        "win": "FALSE",
+        "total": "total_profit",
+        "metric": "rrr"
+    },
+}
+
+def _aggregate_select(kind, source, rows, direction="1"):
+    return f"""SELECT user_id, '{kind}', {source['asset_type']},
+        {direction} * COUNT(*),
+        {direction} * COUNT(*) FILTER (WHERE {source['win']}),
+        {direction} * COALESCE(SUM({source['total']}), 0),
+        {direction} * COALESCE(SUM({source['metric']}), 0),
+        {direction} * COUNT({source['metric']})
+    FROM {rows}
+    GROUP BY 1, 3"""
+
+def _trigger_statements(kind, source):
+    function = f"portfolio_summary_{kind}"
+    statements = [
+        f"""CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        DECLARE
+            direction INTEGER := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+        BEGIN
+            INSERT INTO portfolio_summary AS s
+                (user_id, kind, asset_type, count, wins, total, metric_sum, metric_count)
+            {_aggregate_select(kind, source, 'changed_rows', 'direction')}
+            ON CONFLICT (user_id, kind, asset_type) DO UPDATE SET
+                count = s.count + EXCLUDED.count,
+                wins = s.wins + EXCLUDED.wins,
+                total = s.total + EXCLUDED.total,
+                metric_sum = s.metric_sum + EXCLUDED.metric_sum,
+                metric_count = s.metric_count + EXCLUDED.metric_count;
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM portfolio_summary
+                WHERE kind = '{kind}' AND count <= 0
+                AND user_id IN (SELECT DISTINCT user_id FROM changed_rows);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql"""
+    ]
+    for event, transition in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        trigger = f"{function}_{event.lower()}"
+        statements.append(f"DROP TRIGGER IF EXISTS {trigger} ON {source['table']}")
+        statements.append(
+            f"""CREATE TRIGGER {trigger} AFTER {event} ON {source['table']}
+            REFERENCING {transition} TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()"""
+        )
+    return statements
+
+def rebuild_statements():
+    statements = [
+        "LOCK TABLE saved_profit_loss, saved_dividend, saved_rrr IN SHARE MODE",
+        "DELETE FROM portfolio_summary"
+    ]
+    for kind, source in SUMMARY_SOURCES.items():
+        statements.append(
+            f"""INSERT INTO portfolio_summary
+                (user_id, kind, asset_type, count, wins, total, metric_sum, metric_count)
+            {_aggregate_select(kind, source, source['table'])}"""
+        )
+    return statements
+
+def migration_statements():
+    statements = [
+        """CREATE TABLE IF NOT EXISTS portfolio_summary (
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            asset_type TEXT NOT NULL DEFAULT '',
+            count BIGINT NOT NULL DEFAULT 0,
+            wins BIGINT NOT NULL DEFAULT 0,
+            total NUMERIC NOT NULL DEFAULT 0,
+            metric_sum NUMERIC NOT NULL DEFAULT 0,
+            metric_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, kind, asset_type)
+        )"""
+    ]
+    for kind, source in SUMMARY_SOURCES.items():
+        statements.extend(_trigger_statements(kind, source))
+    return statements + rebuild_statements()
+
+def rebuild_summary():
+    conn = db_conn()
+    cursor = conn.cursor()
+    try:
+        for statement in rebuild_statements():
+            cursor.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def _average(total, count):
+    return total / count if count else None
+
+def build_summary(rows):
+    summary = {
+        "profit_loss": {
+            "count": 0, "wins": 0, "win_rate": None, "total_profit_loss": 0.0,
+            "average_yield": None, "by_asset_type": {}
+        },
+        "dividend": {"count": 0, "total_dividends": 0.0, "average_yield": None},
+        "rrr": {"count": 0, "total_potential_profit": 0.0, "average_rrr": None}
+    }
+    totals = {kind: [0, 0, 0.0, 0.0, 0] for kind in SUMMARY_SOURCES}
+    for kind, asset_type, count, wins, total, metric_sum, metric_count in rows:
+        if kind == "profit_loss":
+            summary["profit_loss"]["by_asset_type"][asset_type] = {
+                "count": count,
+                "wins": wins,
+                "win_rate": _average(wins, count),
+                "total_profit_loss": total,
+                "average_yield": _average(metric_sum, metric_count)
+            }
+        accumulated = totals[kind]
+        for i, value in enumerate((count, wins, total, metric_sum, metric_count)):
+            accumulated[i] += value
+
+    count, wins, total, metric_sum, metric_count = totals["profit_loss"]
+    summary["profit_loss"].update({
+        "count": count,
+        "wins": wins,
+        "win_rate": _average(wins, count),
+        "total_profit_loss": total,
+        "average_yield": _average(metric_sum, metric_count)
+    })
+    count, _, total, metric_sum, metric_count = totals["dividend"]
+    summary["dividend"].update({
+        "count": count,
+        "total_dividends": total,
+        "average_yield": _average(metric_sum, metric_count)
+    })
+    count, _, total, metric_sum, metric_count = totals["rrr"]
+    summary["rrr"].update({
+        "count": count,
+        "total_potential_profit": total,
+        "average_rrr": _average(metric_sum, metric_count)
+    })
+    return summary
+
+if __name__ == "__main__":
+    rebuild_summary()
+    print("Rebuilt portfolio summary")
@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TIMESERIES_DIR = os.getenv('TIMESERIES_DIR', os.path.join('data', 'timeseries'))
+TIMESERIES_ENABLED = os.getenv('TIMESERIES_ENABLED', 'true').lower() == 'true'
+HISTORY_DEFAULT_LIMIT = int(os.getenv('HISTORY_DEFAULT_LIMIT', 1000))
+HISTORY_MAX_LIMIT = int(os.getenv('HISTORY_MAX_LIMIT', 10000))
+
+RECORD = np.dtype([('ts', '<i8'), ('price', '<f8')])
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9.\-]+$')
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+def _lock_file(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+def _unlock_file(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+class Series:
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        self._lock = threading.Lock()
+        self._map = None
+        self._length = 0
+        self.last_ts = None
+        with self._locked():
+            size = os.fstat(self._fd).st_size
+            if size % RECORD.itemsize:
+                os.ftruncate(self._fd, size - size % RECORD.itemsize)
+            self._refresh()
+
+    def __len__(self):
+        return self._length
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            _lock_file(self._fd)
+            try:
+                yield
+            finally:
+                _unlock_file(self._fd)
+
+    def _refresh(self):
+        self._length = os.fstat(self._fd).st_size // RECORD.itemsize
+        self.last_ts = None
+        if self._length:
+            os.lseek(self._fd, (self._length - 1) * RECORD.itemsize, os.SEEK_SET)
+            last = np.frombuffer(os.read(self._fd, RECORD.itemsize), dtype=RECORD)
+            self.last_ts = int(last['ts'][0])
+
+    def _write(self, index, ts, price):
+        os.lseek(self._fd, index * RECORD.itemsize, os.SEEK_SET)
+        os.write(self._fd, np.array([(ts, price)], dtype=RECORD).tobytes())
+
+    def append_many(self, records):
+        appended = 0
+        with self._locked():
+            self._refresh()
+            for ts, price in records:
+                if self.last_ts is not None and ts < self.last_ts:
+                    continue
+                if ts == self.last_ts:
+                    self._write(self._length - 1, ts, price)
+                else:
+                    self._write(self._length, ts, price)
+                    self._length += 1
+                self.last_ts = ts
+                appended += 1
+        return appended
+
+    def append(self, ts, price):
+        return self.append_many([(ts, price)]) == 1
+
+    def view(self):
+        length = os.fstat(self._fd).st_size // RECORD.itemsize
+        if not length:
+            return np.empty(0, dtype=RECORD)
+        if self._map is None or len(self._map) != length:
+            self._map = np.memmap(self.path, dtype=RECORD, mode='r', shape=(length,))
+        return self._map
+
+    def range(self, start=None, end=None, limit=None):
+        data = self.view()
+        timestamps = data['ts']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(data) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return data[lo:hi]
+
+    def close(self):
+        self._map = None
+        os.close(self._fd)
+
+class TimeSeriesStore:
+    def __init__(self, root, enabled=True):
+        self.root = root
+        self.enabled = enabled
+        self._series = {}
+        self.appended = 0
+        self.errors = 0
+
+    def _get_series(self, symbol, interval, create):
+        key = (symbol, interval)
+        series = self._series.get(key)
+        if series is not None:
+            return series
+
+        if not _NAME_PATTERN.match(symbol) or not _NAME_PATTERN.match(interval):
+            raise ValueError(f"Invalid series name: {symbol}/{interval}")
+        path = os.path.join(self.root, f"{symbol}_{interval}.bin")
+        if not create and not os.path.exists(path):
+            return None
+
+        os.makedirs(self.root, exist_ok=True)
+        series = Series(path)
+        self._series[key] = series
+        return series
+
+    def append_many(self, symbol, interval, records):
+        if not self.enabled:
+            return
+        try:
+            series = self._get_series(symbol, interval, create=True)
+            self.appended += series.append_many((int(ts), float(price)) for ts, price in records)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error writing {symbol}/{interval} history: {e}")
+
+    def append(self, symbol, interval, ts, price):
+        self.append_many(symbol, interval, [(ts, price)])
+
+    def range(self, symbol, interval, start=None, end=None, limit=None):
+        series = self._get_series(symbol, interval, create=False)
+        if series is None:
+            return np.empty(0, dtype=RECORD)
+        return series.range(start, end, limit)
+
+    def close(self):
+        series, self._series = self._series, {}
+        for item in series.values():
+            item.close()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "series": len(self._series),
+            "appended": self.appended,
+            "errors": self.errors
+        }
+
+price_store = TimeSeriesStore(TIMESERIES_DIR, TIMESERIES_ENABLED)
@@ -0,0 +1,108 @@
+import os
+import httpx
+from dotenv import load_dotenv
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from quota import build_budgets
+
+load_dotenv()
+
+try:
+    import h2
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+BINANCE = 'binance'
+OXR = 'oxr'
+FINNHUB = 'finnhub'
+
+UPSTREAM_CONFIG = {
+    BINANCE: {
+        'base_url': os.getenv('BINANCE_BASE_URL', 'https://api.binance.com'),
+        'timeout': float(os.getenv('BINANCE_TIMEOUT', 5)),
+        'max_connections': int(os.getenv('BINANCE_MAX_CONNECTIONS', 20)),
+    },
+    OXR: {
+        'base_url': os.getenv('OXR_BASE_URL', 'https://openexchangerates.org'),
+        'timeout': float(os.getenv('OXR_TIMEOUT', 10)),
+        'max_connections': int(os.getenv('OXR_MAX_CONNECTIONS', 10)),
+    },
+    FINNHUB: {
+        'base_url': os.getenv('FINNHUB_BASE_URL', 'https://finnhub.io'),
+        'timeout': float(os.getenv('FINNHUB_TIMEOUT', 5)),
+        'max_connections': int(os.getenv('FINNHUB_MAX_CONNECTIONS', 10)),
+    },
+}
+
+CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3))
+KEEPALIVE_EXPIRY = float(os.getenv('UPSTREAM_KEEPALIVE_EXPIRY', 60))
+
+_clients = {}
+
+breakers = {name: CircuitBreaker(name) for name in UPSTREAM_CONFIG}
+budgets = build_budgets(BINANCE, OXR, FINNHUB)
+
+def _build_client(name):
+    config = UPSTREAM_CONFIG[name]
+    return httpx.AsyncClient(
+        base_url=config['base_url'],
+        http2=HTTP2,
+        timeout=httpx.Timeout(config['timeout'], connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=config['max_connections'],
+            max_keepalive_connections=config['max_connections'],
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+    )
+
+def open_clients():
+    for name in UPSTREAM_CONFIG:
+        if name not in _clients:
+            _clients[name] = _build_client(name)
+
+async def close_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Error closing upstream client: {e}")
+
+def get_client(name):
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+async def _checked_get(name, path, params):
+    response = await get_client(name).get(path, params=params)
+    if response.status_code >= 500 or response.status_code == 429:
+        response.raise_for_status()
+    return response
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+async def upstream_get(name, path, params=None):
+    budget = budgets[name]
+    key_budget = await budget.acquire()
+    params = dict(params or {})
+    if budget.key_param and key_budget.key is not None:
+        params[budget.key_param] = key_budget.key
+
+    try:
+        response = await breakers[name].call(_checked_get, name, path, params)
+    except CircuitOpenError:
+        await budget.refund(key_budget)
+        raise
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            await budget.rate_limited(key_budget, _retry_after(e.response))
+        raise
+    response.raise_for_status()
+    return response
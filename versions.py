@@ -0,0 +1,27 @@
+VERSIONED_TABLES = ("saved_profit_loss", "saved_dividend", "saved_rrr")
+
+def migration_statements():
+    statements = [
+        """CREATE TABLE IF NOT EXISTS portfolio_versions (
+            user_id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )""",
+        """CREATE OR REPLACE FUNCTION portfolio_version_bump() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO portfolio_versions AS v (user_id, version)
+            SELECT DISTINCT user_id, 1 FROM changed_rows
+            ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql"""
+    ]
+    for table in VERSIONED_TABLES:
+        for event, transition in (("INSERT", "NEW"), ("DELETE", "OLD")):
+            trigger = f"{table}_version_{event.lower()}"
+            statements.append(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+            statements.append(
+                f"""CREATE TRIGGER {trigger} AFTER {event} ON {table}
+                REFERENCING {transition} TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION portfolio_version_bump()"""
+            )
+    return statements
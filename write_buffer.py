@@ -0,0 +1,151 @@
+import os
+import time
+import asyncio
+from dotenv import load_dotenv
+from database import run_db
+from models import SavedCalculations
+
+load_dotenv()
+
+WRITE_BUFFER_ENABLED = os.getenv('WRITE_BUFFER_ENABLED', 'false').lower() == 'true'
+WRITE_BUFFER_DELAY = float(os.getenv('WRITE_BUFFER_DELAY_MS', 5)) / 1000
+WRITE_BUFFER_MAX_BATCH = int(os.getenv('WRITE_BUFFER_MAX_BATCH', 100))
+WRITE_BUFFER_MAX_QUEUE = int(os.getenv('WRITE_BUFFER_MAX_QUEUE', 1000))
+
+class WriteBufferFull(Exception):
+    pass
+
+class PendingWrite:
+    def __init__(self, table, values, future):
+        self.table = table
+        self.columns = tuple(values)
+        self.values = tuple(values.values())
+        self.future = future
+        self.queued_at = time.monotonic()
+
+class WriteBuffer:
+    def __init__(self, enabled, delay, max_batch, max_queue):
+        self.enabled = enabled
+        self.delay = delay
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._queue = None
+        self._task = None
+        self.flushes = 0
+        self.rows = 0
+        self.failed_flushes = 0
+        self.failed_rows = 0
+        self.rejected = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    async def submit(self, table, values):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(PendingWrite(table, values, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise WriteBufferFull("Too many pending saves, please try again shortly")
+        return await future
+
+    async def _flush(self, batch):
+        groups = {}
+        for write in batch:
+            groups.setdefault((write.table, write.columns), []).append(write)
+
+        started = time.monotonic()
+        try:
+            results = await run_db(SavedCalculations.save_many, [
+                (table, columns, [write.values for write in writes])
+                for (table, columns), writes in groups.items()
+            ])
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Error flushing {len(batch)} buffered saves: {e}")
+            for write in batch:
+                if not write.future.done():
+                    write.future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        for writes, ids in zip(groups.values(), results):
+            for write, calculation_id in zip(writes, ids):
+                wait_time = finished - write.queued_at
+                self.wait_time_total += wait_time
+                self.wait_time_max = max(self.wait_time_max, wait_time)
+                if write.future.done():
+                    continue
+                if isinstance(calculation_id, Exception):
+                    self.failed_rows += 1
+                    write.future.set_exception(calculation_id)
+                else:
+                    write.future.set_result(calculation_id)
+
+        flush_time = finished - started
+        self.flushes += 1
+        self.rows += len(batch)
+        self.flush_time_total += flush_time
+        self.flush_time_max = max(self.flush_time_max, flush_time)
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            await asyncio.sleep(self.delay)
+
+            batch = [first]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                write = self._queue.get_nowait()
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+            await self._flush(batch)
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)
+        await task
+
+        remaining = []
+        while not self._queue.empty():
+            write = self._queue.get_nowait()
+            if write is not None:
+                remaining.append(write)
+        for start in range(0, len(remaining), self.max_batch):
+            await self._flush(remaining[start:start + self.max_batch])
+
+    def metrics(self):
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "failed_rows": self.failed_rows,
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "batch_size_avg": self.rows / self.flushes if self.flushes else 0.0,
+            "flush_time_avg": self.flush_time_total / self.flushes if self.flushes else 0.0,
+            "flush_time_max": self.flush_time_max,
+            "wait_time_avg": self.wait_time_total / self.rows if self.rows else 0.0,
+            "wait_time_max": self.wait_time_max
+        }
+
+write_buffer = WriteBuffer(WRITE_BUFFER_ENABLED, WRITE_BUFFER_DELAY, WRITE_BUFFER_MAX_BATCH, WRITE_BUFFER_MAX_QUEUE)